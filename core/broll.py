@@ -10,10 +10,11 @@ import json
 import os
 import re
 import time
+from functools import lru_cache
 from typing import TYPE_CHECKING, Optional, Callable, Awaitable, List, Tuple, Iterable
 
 from ui.logger import logger
-from core.browser import safe_click, random_delay, click_canvas_center
+from core.browser import safe_click, random_delay, click_canvas_center, wait_for_focused_text
 from utils.clipboard import parse_nano_banano_prompt, generate_image, copy_image_to_clipboard
 
 if TYPE_CHECKING:
@@ -149,9 +150,25 @@ RESULT_CARD_SELECTORS = [
 
 LEGACY_RESULTS_CARD_SELECTOR = "div.tw-group.tw-relative.tw-overflow-hidden.tw-rounded-md"
 
+# Compiled once: these are matched on every B-roll scene
+MEDIA_HEADER_RE = re.compile(r"^\s*(Медиа|Media)\s*$", re.I)
+MEDIA_HEADER_CASE_RE = re.compile(r"^\s*(Медиа|Media)\s*$")
+VIDEO_TAB_RE = re.compile(r"^Video$|^Видео$", re.I)
+SEARCH_TEXTBOX_RE = re.compile(r"(Искать видео онлайн|Search videos online|Search|Поиск)", re.I)
+SEARCH_INPUT_TEXT_RE = re.compile(r"Search|Искать", re.I)
+REMOVE_BUTTON_RE = re.compile(r"^\s*(Remove|Удалить)\s*$", re.I)
+SET_AS_BG_RE = re.compile(
+    r"(Set as BG|Set as Background|Set as background|Make background|Сделать фоном|Сделать фон)",
+    re.I,
+)
+
 
 def _build_name_regex(names: Iterable[str], *, exact: bool) -> re.Pattern:
-    vals = [str(x).strip() for x in (names or []) if str(x).strip()]
+    return _name_regex_cached(tuple(str(x).strip() for x in (names or []) if str(x).strip()), exact)
+
+
+@lru_cache(maxsize=128)
+def _name_regex_cached(vals: Tuple[str, ...], exact: bool) -> re.Pattern:
     if not vals:
         return re.compile(r"^$\b")
     inner = "|".join(re.escape(v) for v in vals)
@@ -161,26 +178,51 @@ def _build_name_regex(names: Iterable[str], *, exact: bool) -> re.Pattern:
     return re.compile(rf"^\s*(?:{inner})(?:\b|\s|$)", re.I)
 
 
-async def _first_visible(loc) -> Optional["Locator"]:
+# Same visibility rule as Locator.is_visible(): non-empty box and not visibility:hidden.
+_JS_FIRST_VISIBLE_INDEX = """
+(els, limit) => {
+  const n = Math.min(els.length, limit);
+  for (let i = 0; i < n; i++) {
+    const r = els[i].getBoundingClientRect();
+    if (!r.width || !r.height) continue;
+    if (window.getComputedStyle(els[i]).visibility === 'hidden') continue;
+    return i;
+  }
+  return -1;
+}
+"""
+
+
+_JS_COMBO_INFO = """
+(el) => {
+  const sel = el.querySelector('[data-selected-value="true"]');
+  return {
+    controls: el.getAttribute('aria-controls') || el.getAttribute('aria-owns') || '',
+    text: el.innerText || '',
+    selected: sel ? (sel.textContent || '').trim() : '',
+  };
+}
+"""
+
+
+async def _first_visible(loc, limit: int = 40) -> Optional["Locator"]:
+    """Return the first visible match of a locator, resolved in one evaluate_all round-trip."""
     try:
-        cnt = await loc.count()
+        idx = await loc.evaluate_all(_JS_FIRST_VISIBLE_INDEX, limit)
+    except asyncio.CancelledError:
+        raise
     except Exception:
         return None
-    for i in range(min(cnt, 40)):
-        try:
-            cand = loc.nth(i)
-            if await cand.is_visible():
-                return cand
-        except Exception:
-            continue
-    return None
+    if not isinstance(idx, int) or idx < 0:
+        return None
+    return loc.nth(idx)
 
 
 async def _media_panel_scope(page: "Page") -> "Page | Locator":
     """Try to scope searches to the Media panel container (best-effort)."""
     try:
         header = page.locator(MEDIA_PANEL_HEADER).filter(
-            has_text=re.compile(r"^\s*(Медиа|Media)\s*$", re.I)
+            has_text=MEDIA_HEADER_RE
         )
         if await header.count() == 0:
             return page
@@ -262,37 +304,43 @@ async def _select_from_combobox(
         logger.warning(f"[broll] {what} combobox not found")
         return False
 
+    # Radix portal id and current text are stable for this combobox: read them once, in one round-trip.
+    listbox_id = None
+    combo_text = ""
+    combo_selected = ""
+    try:
+        info = await combo.evaluate(_JS_COMBO_INFO)
+        listbox_id = str(info.get("controls") or "").strip() or None
+        combo_text = str(info.get("text") or "")
+        combo_selected = str(info.get("selected") or "")
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        listbox_id = None
+
+    # The trigger already shows the wanted value: skip the open/click/escape round-trips.
+    current = combo_selected or combo_text
+    if current.strip() and option_re.search(current):
+        logger.info(f"[broll] {what} already set: {current.strip()!r}")
+        return True
+
+    listbox_sel = f'[role="listbox"][id="{listbox_id}"]' if listbox_id else None
+
     # Open combobox and select option.
     for attempt in range(3):
         try:
             if gate_callback:
                 await gate_callback()
 
-            listbox_id = None
-            try:
-                listbox_id = (await combo.get_attribute("aria-controls")) or (await combo.get_attribute("aria-owns"))
-                if listbox_id:
-                    listbox_id = str(listbox_id).strip()
-            except Exception:
-                listbox_id = None
-
-            try:
-                combo_text = ""
-                try:
-                    combo_text = (await combo.inner_text()) or ""
-                except Exception:
-                    combo_text = ""
-                logger.info(f"[broll] {what} combobox click: text={combo_text.strip()!r} aria_controls={listbox_id!r}")
-            except Exception:
-                pass
+            logger.info(f"[broll] {what} combobox click: text={combo_text.strip()!r} aria_controls={listbox_id!r}")
 
             if not await safe_click(combo, page, timeout_ms=3500):
                 continue
 
             listbox = None
-            if listbox_id:
+            if listbox_sel:
                 try:
-                    lb = page.locator(f'[role="listbox"][id="{listbox_id}"]')
+                    lb = page.locator(listbox_sel)
                     await lb.first.wait_for(state="visible", timeout=2500)
                     listbox = await _first_visible(lb)
                 except Exception:
@@ -390,7 +438,7 @@ async def open_media_panel(
     # Check if already open
     try:
         panel_header = page.locator(MEDIA_PANEL_HEADER).filter(
-            has_text=re.compile(r'^\s*(Медиа|Media)\s*$')
+            has_text=MEDIA_HEADER_CASE_RE
         )
         if await panel_header.count() > 0:
             return True
@@ -410,14 +458,14 @@ async def open_media_panel(
     
     # Button by role
     try:
-        candidates.append(page.get_by_role('button', name=re.compile(r'^\s*(Медиа|Media)\s*$', re.I)))
+        candidates.append(page.get_by_role('button', name=MEDIA_HEADER_RE))
     except Exception:
         pass
     
     # Button by text
     try:
         candidates.append(page.locator('button').filter(
-            has_text=re.compile(r'^\s*(Медиа|Media)\s*$', re.I)
+            has_text=MEDIA_HEADER_RE
         ).first)
     except Exception:
         pass
@@ -440,7 +488,7 @@ async def open_media_panel(
             
             try:
                 panel_header = page.locator(MEDIA_PANEL_HEADER).filter(
-                    has_text=re.compile(r'^\s*(Медиа|Media)\s*$')
+                    has_text=MEDIA_HEADER_CASE_RE
                 )
                 if ok and await panel_header.count() > 0:
                     return True
@@ -466,7 +514,7 @@ async def select_video_tab(
     """
     # Strict verification loop
     # Updated selector to target the tab role specifically
-    tab_locator = page.get_by_role("tab", name=re.compile(r"^Video$|^Видео$", re.I))
+    tab_locator = page.get_by_role("tab", name=VIDEO_TAB_RE)
     
     for attempt in range(3):
         try:
@@ -504,7 +552,7 @@ async def select_video_tab(
                 logger.warning(f"[broll] video tab not found, attempt {attempt+1}")
                 # Fallback to button if tab role fails
                 alt_tab = page.locator("button").filter(
-                    has_text=re.compile(r"^Video$|^Видео$", re.I)
+                    has_text=VIDEO_TAB_RE
                 )
                 if await alt_tab.count() > 0:
                     await safe_click(alt_tab.first, page, timeout_ms=3000)
@@ -587,9 +635,7 @@ async def locate_search_input(page: "Page") -> Optional["Locator"]:
     """
     # Try by role first
     try:
-        inp = page.get_by_role("textbox", name=re.compile(
-            r"(Искать видео онлайн|Search videos online|Search|Поиск)", re.I
-        ))
+        inp = page.get_by_role("textbox", name=SEARCH_TEXTBOX_RE)
         if await inp.count() > 0:
             return inp.first
     except Exception:
@@ -613,7 +659,7 @@ async def locate_search_input(page: "Page") -> Optional["Locator"]:
              return inputs
              
         # Broader fallback
-        inputs = page.locator('input[type="text"]').filter(has_text=re.compile(r"Search|Искать", re.I))
+        inputs = page.locator('input[type="text"]').filter(has_text=SEARCH_INPUT_TEXT_RE)
         if await inputs.count() > 0:
              return inputs.first
     except Exception:
@@ -695,11 +741,9 @@ async def search_and_select_broll(
     
     try:
         await page.keyboard.press('Meta+A')
-        await asyncio.sleep(0.05)
         await page.keyboard.press('Backspace')
-        await asyncio.sleep(0.05)
         await page.keyboard.insert_text(query)
-        await asyncio.sleep(0.1)
+        await wait_for_focused_text(page, query)
         await page.keyboard.press('Enter')
     except Exception as e:
         logger.error(f"[broll] search input failed: {e}")
@@ -793,10 +837,7 @@ async def click_make_background(
     Returns:
         True if button was clicked
     """
-    name_re = re.compile(
-        r"(Set as BG|Set as Background|Set as background|Make background|Сделать фоном|Сделать фон)",
-        re.I,
-    )
+    name_re = SET_AS_BG_RE
 
     try:
         await page.keyboard.press("Escape")
@@ -917,7 +958,7 @@ async def click_make_background(
         pass
 
     try:
-        remove_btn = page.locator("button").filter(has_text=re.compile(r"^\s*(Remove|Удалить)\s*$", re.I))
+        remove_btn = page.locator("button").filter(has_text=REMOVE_BUTTON_RE)
         landscape_btn = page.locator(
             'button[aria-label*="Landscape"], button[aria-label*="Portrait"]'
         )
@@ -1191,10 +1232,7 @@ async def handle_nano_banano(
         except Exception as e:
             return False, f"paste failed: {e}"
 
-        name_re = re.compile(
-            r"(Set as BG|Set as Background|Set as background|Make background|Сделать фоном|Сделать фон)",
-            re.I,
-        )
+        name_re = SET_AS_BG_RE
         btn = page.get_by_role("button", name=name_re)
         waited = False
         try:
@@ -79,6 +79,92 @@ async def safe_click(
     return False
 
 
+async def selector_exists(page: "Page", selector: str) -> bool:
+    """
+    Check whether a plain CSS selector matches anything on the page.
+    
+    Uses a single evaluate round-trip instead of Locator.count().
+    Playwright-only selectors (:has-text, text=, xpath=) are not supported here,
+    use locator_exists for those.
+    
+    Args:
+        page: Playwright Page object
+        selector: CSS selector
+        
+    Returns:
+        True if at least one element matches
+    """
+    try:
+        return bool(await page.evaluate("(s) => !!document.querySelector(s)", selector))
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return False
+
+
+_JS_FOCUSED_HAS_TEXT = """
+(txt) => {
+  const el = document.activeElement;
+  if (!el) return false;
+  const raw = (typeof el.value === 'string') ? el.value : (el.innerText || '');
+  // Editors may reflow whitespace and typographic quotes, so compare a normalized form
+  const norm = (s) => String(s || '')
+    .replace(/[\\u201C\\u201D\\u201E\\u00AB\\u00BB]/g, '"')
+    .replace(/[\\u2018\\u2019\\u201A`]/g, "'")
+    .replace(/\\s+/g, ' ')
+    .trim()
+    .toLowerCase();
+  return norm(raw).includes(norm(txt));
+}
+"""
+
+
+async def wait_for_focused_text(page: "Page", text: str, timeout_ms: int = 300) -> bool:
+    """
+    Wait until the focused element shows the text that was just typed.
+    
+    Replaces fixed post-typing sleeps: returns as soon as the editor or input
+    has committed the text. Both sides are compared with whitespace, quotes
+    and case normalized. The default timeout is close to the old sleep, so
+    an editor that rewrites the text further costs no more than before.
+    
+    Args:
+        page: Playwright Page object
+        text: Text expected inside the focused element
+        timeout_ms: Upper bound for the wait
+        
+    Returns:
+        True if the text appeared within the timeout
+    """
+    try:
+        await page.wait_for_function(_JS_FOCUSED_HAS_TEXT, arg=str(text or ""), timeout=timeout_ms)
+        return True
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return False
+
+
+async def locator_exists(loc: "Locator") -> bool:
+    """
+    Check whether a locator chain currently matches anything.
+    
+    Does not wait: a miss returns after a single count() round-trip.
+    
+    Args:
+        loc: Playwright Locator (filters and Playwright pseudo-selectors allowed)
+        
+    Returns:
+        True if at least one element matches right now
+    """
+    try:
+        return await loc.count() > 0
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return False
+
+
 async def scroll_into_view(loc: "Locator") -> bool:
     """
     Scroll an element into the visible viewport.
@@ -161,11 +247,9 @@ async def fast_replace_text(
     
     try:
         await page.keyboard.press('Meta+A')
-        await asyncio.sleep(0.05)
         await page.keyboard.press('Backspace')
-        await asyncio.sleep(0.05)
         await page.keyboard.insert_text(text)
-        await asyncio.sleep(0.1)
+        await wait_for_focused_text(page, text)
         await page.keyboard.press('Tab')
     except Exception:
         pass
@@ -221,22 +305,32 @@ async def _show_click_marker(page: "Page", x: float, y: float) -> None:
         return
 
 
-async def human_coordinate_click(page: "Page", locator: "Locator") -> bool:
+async def human_coordinate_click(page: "Page", locator: "Locator", box: Optional[dict] = None) -> bool:
+    """
+    Click the center of an element with explicit mouse move/down/up.
+
+    Args:
+        page: Playwright Page object
+        locator: Element to click
+        box: Bounding box already measured in the viewport by the caller;
+            skips the scroll/visibility/bounding_box round-trips when given
+    """
     try:
-        try:
-            await locator.scroll_into_view_if_needed()
-        except Exception:
-            pass
+        if not box:
+            try:
+                await locator.scroll_into_view_if_needed()
+            except Exception:
+                pass
 
-        try:
-            await locator.wait_for(state="visible", timeout=5000)
-        except Exception:
-            pass
+            try:
+                await locator.wait_for(state="visible", timeout=5000)
+            except Exception:
+                pass
 
-        # Recalculate box right before interaction
-        box = await locator.bounding_box()
-        if not box:
-            return False
+            # Recalculate box right before interaction
+            box = await locator.bounding_box()
+            if not box:
+                return False
 
         x = box["x"] + box["width"] * 0.5
         y = box["y"] + box["height"] * 0.5
@@ -6,7 +6,7 @@ not via scattered os.getenv() calls in business logic.
 """
 
 from functools import lru_cache
-from typing import Optional
+from typing import FrozenSet, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -67,11 +67,22 @@ def get_settings() -> Settings:
     Get cached application settings.
     
     Settings are loaded once and cached for performance.
-    Call get_settings.cache_clear() if you need to reload.
+    Call get_settings.cache_clear() and _present_secrets.cache_clear()
+    if you need to reload.
     """
     return Settings()
 
 
+@lru_cache
+def _present_secrets() -> FrozenSet[str]:
+    """Names of settings that hold a non-empty value."""
+    settings = get_settings()
+    return frozenset(
+        k for k, v in settings.model_dump().items()
+        if v and str(v).strip()
+    )
+
+
 def validate_required_secrets(*keys: str) -> bool:
     """
     Validate that required secrets are present.
@@ -85,12 +96,8 @@ def validate_required_secrets(*keys: str) -> bool:
     Raises:
         ValueError: If any required secret is missing
     """
-    settings = get_settings()
-    missing = []
-    for key in keys:
-        value = getattr(settings, key, "")
-        if not value or not str(value).strip():
-            missing.append(key.upper())
+    present = _present_secrets()
+    missing = [key.upper() for key in keys if key not in present]
     
     if missing:
         raise ValueError(f"Missing required secrets: {', '.join(missing)}")
@@ -8,11 +8,12 @@ These functions are extracted from HeyGenAutomation for modularity.
 import asyncio
 import random
 import re
+from functools import lru_cache
 from typing import TYPE_CHECKING, Optional, Callable, Awaitable, List, Dict, Any
 
 from ui.logger import logger
 from utils.helpers import normalize_speaker_key, normalize_text_for_compare
-from core.browser import safe_click, read_locator_text, fast_replace_text
+from core.browser import safe_click, read_locator_text, fast_replace_text, locator_exists, wait_for_focused_text
 from core.browser import human_fast_center_click, human_coordinate_click, _show_click_marker
 from ui.step_wrapper import step
 
@@ -24,6 +25,23 @@ if TYPE_CHECKING:
 SCENE_TEXT_SELECTOR = 'span[data-node-view-content-react]'
 MORE_BUTTON_SELECTOR = 'button:has(iconpark-icon[name="more-level"])'
 DELETE_MENU_SELECTOR = 'div[role="menuitem"]'
+DELETE_SCENE_RE = re.compile(r'(Удалить\s*сцену|Delete\s*Scene)', re.I)
+DELETE_ITEM_RE = re.compile(r"Delete|Удалить")
+ENHANCE_VOICE_RE = re.compile(r'Enhance Voice|Усилить голос')
+
+
+@lru_cache(maxsize=256)
+def _text_label_re(text_label: str) -> re.Pattern:
+    """Exact-match pattern for a scene placeholder label such as text_3."""
+    return re.compile(rf'^\s*{re.escape(text_label)}\s*$')
+
+# Which text_N placeholders are still on the page, in one DOM pass (mirrors :has-text substring match)
+_JS_PRESENT_PLACEHOLDERS = """
+({ sel, labels }) => {
+  const texts = Array.from(document.querySelectorAll(sel)).map((el) => (el.textContent || '').toLowerCase());
+  return labels.filter((label) => texts.some((t) => t.includes(label.toLowerCase())));
+}
+"""
 
 
 @step("find_scene_anchor")
@@ -146,7 +164,7 @@ async def smart_delete_scene(
              
              # Click Delete in Menu
              delete_item = page.locator(DELETE_MENU_SELECTOR).filter(
-                 has_text=re.compile(r"Delete|Удалить")
+                 has_text=DELETE_ITEM_RE
              )
              
              if await delete_item.count() > 0:
@@ -176,7 +194,7 @@ async def find_scene_locator(
     """
     text_label = f"text_{scene_number}"
     span_locator = page.locator(SCENE_TEXT_SELECTOR).filter(
-        has_text=re.compile(rf'^\s*{re.escape(text_label)}\s*$')
+        has_text=_text_label_re(text_label)
     )
     
     try:
@@ -261,15 +279,13 @@ async def insert_text_in_scene(
             pass
 
         await page.keyboard.press('Meta+A')
-        await asyncio.sleep(0.05)
         await page.keyboard.press('Backspace')
-        await asyncio.sleep(random.uniform(0.05, 0.1))
         
         if gate_callback:
             await gate_callback()
         
         await page.keyboard.insert_text(text)
-        await asyncio.sleep(random.uniform(0.1, 0.2))
+        await wait_for_focused_text(page, text)
         try:
             await editor.first.evaluate("(el) => el && el.blur && el.blur()")
         except Exception:
@@ -285,7 +301,7 @@ async def insert_text_in_scene(
         if enable_enhance_voice:
             try:
                 btn = page.locator('button:has(iconpark-icon[name="director-mode"])').filter(
-                    has_text=re.compile(r'Enhance Voice|Усилить голос')
+                    has_text=ENHANCE_VOICE_RE
                 )
                 if await btn.count() > 0:
                     await btn.last.click()
@@ -399,7 +415,7 @@ async def fill_scene(
         
         # Find the scene locator
         span_locator = page.locator(SCENE_TEXT_SELECTOR).filter(
-            has_text=re.compile(rf'^\s*{re.escape(text_label)}\s*$')
+            has_text=_text_label_re(text_label)
         )
         
         count = await span_locator.count()
@@ -510,6 +526,22 @@ async def delete_empty_scenes(
     except Exception:
         await asyncio.sleep(post_reload_wait)
     
+    # Deleting a scene needs the toolbar menu, so it stays a UI loop; but scenes that
+    # are already gone are filtered out here instead of each costing a locator timeout.
+    try:
+        present = set(await page.evaluate(
+            _JS_PRESENT_PLACEHOLDERS,
+            {"sel": SCENE_TEXT_SELECTOR, "labels": [f"text_{n}" for n in empty_scenes]},
+        ))
+        skipped = [n for n in empty_scenes if f"text_{n}" not in present]
+        if skipped:
+            logger.debug(f"[delete_empty_scenes] not on page, skipping: {skipped}")
+        empty_scenes = [n for n in empty_scenes if f"text_{n}" in present]
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        pass
+    
     for scene_num in empty_scenes:
         if gate_callback:
             await gate_callback()
@@ -518,9 +550,7 @@ async def delete_empty_scenes(
             text_label = f"text_{scene_num}"
             
             span_locator = page.locator(f'{SCENE_TEXT_SELECTOR}:has-text("{text_label}")')
-            count = await span_locator.count()
-            
-            if count == 0:
+            if not await locator_exists(span_locator):
                 logger.debug(f"[delete_empty_scenes] scene {text_label} not found, skipping")
                 continue
             
@@ -534,33 +564,41 @@ async def delete_empty_scenes(
             if not await safe_click(span_locator.first, page, timeout_ms=3000):
                 continue
             
-            await asyncio.sleep(random.uniform(0.3, 0.5))
-            
-            # Click the more button
+            # Click the more button once the scene toolbar renders it
             more_button = page.locator(MORE_BUTTON_SELECTOR)
-            if await more_button.count() == 0:
+            try:
+                await more_button.last.wait_for(state='visible', timeout=2000)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            if not await locator_exists(more_button):
                 logger.warning(f"[delete_empty_scenes] more button not found for {text_label}")
                 continue
             
             await safe_click(more_button.last, page, timeout_ms=3000)
-            await asyncio.sleep(random.uniform(0.3, 0.5))
             
-            # Find and click delete menu item
-            delete_item = page.locator(DELETE_MENU_SELECTOR).filter(
-                has_text=re.compile(r'(Удалить\s*сцену|Delete\s*Scene)', re.I)
-            )
+            # Find and click delete menu item (the menu opening is the signal, no fixed sleep)
+            delete_item = page.locator(DELETE_MENU_SELECTOR).filter(has_text=DELETE_SCENE_RE)
             
             try:
                 await delete_item.first.wait_for(state='visible', timeout=2000)
+            except asyncio.CancelledError:
+                raise
             except Exception:
                 pass
             
-            if await delete_item.count() == 0:
+            if not await locator_exists(delete_item):
                 logger.warning(f"[delete_empty_scenes] delete menu item not found")
                 continue
             
             await safe_click(delete_item.first, page, timeout_ms=3000)
-            await asyncio.sleep(random.uniform(0.5, 0.8))
+            try:
+                await page.locator(DELETE_MENU_SELECTOR).first.wait_for(state='detached', timeout=2000)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
             
             try:
                 await page.wait_for_selector(
@@ -68,7 +68,24 @@ class SceneData(BaseModel):
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "SceneData":
-        """Create SceneData from a dictionary (CSV row)."""
+        """
+        Create SceneData from a trusted dictionary (CSV row).
+
+        Fields are coerced by hand and the model is built with
+        model_construct, skipping Pydantic validation.
+        """
+        return cls.model_construct(
+            scene_idx=int(data.get("scene_idx", 0) or 0),
+            text=str(data.get("text") or ""),
+            speaker=data.get("speaker"),
+            brolls=data.get("brolls"),
+            title=data.get("title"),
+            template_url=data.get("template_url"),
+        )
+
+    @classmethod
+    def from_dict_validated(cls, data: Dict[str, Any]) -> "SceneData":
+        """Create SceneData from an untrusted dictionary with full validation."""
         return cls(
             scene_idx=int(data.get("scene_idx", 0)),
             text=str(data.get("text", "")),
@@ -7,34 +7,69 @@ Provides a bridge between workflow definitions and core automation functions.
 
 import asyncio
 import re
-from typing import TYPE_CHECKING, Optional, Dict, Any, List, Callable, Awaitable
+from collections import namedtuple
+from enum import IntEnum
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Callable, Awaitable, Tuple
 
 from ui.logger import logger
-from utils.helpers import wf_bool, wf_float, wf_int, wf_render
+from utils.helpers import WF_VAR_PATTERN, wf_bool, wf_float, wf_int, wf_render
 
 if TYPE_CHECKING:
-    from playwright.async_api import Page
+    from playwright.async_api import Page, Locator
 
 
 # Workflow step types
-STEP_NAVIGATE = {"navigate_to_template", "navigate"}
-STEP_WAIT = {"wait_for", "wait_for_selector"}
-STEP_SLEEP = {"wait", "sleep"}
-STEP_CLICK = {"click"}
-STEP_FILL = {"fill"}
-STEP_PRESS = {"press"}
-STEP_SCENE = {"fill_scene"}
-STEP_BROLL = {"handle_broll"}
-STEP_VALIDATE = {"reload_and_validate", "validate"}
-STEP_DELETE = {"delete_empty_scenes"}
-STEP_CONFIRM = {"confirm"}
-STEP_GENERATE = {"generate"}
-STEP_SUBMIT = {"final_submit"}
+STEP_NAVIGATE = frozenset({"navigate_to_template", "navigate"})
+STEP_WAIT = frozenset({"wait_for", "wait_for_selector"})
+STEP_SLEEP = frozenset({"wait", "sleep"})
+STEP_CLICK = frozenset({"click"})
+STEP_FILL = frozenset({"fill"})
+STEP_PRESS = frozenset({"press"})
+STEP_SCENE = frozenset({"fill_scene"})
+STEP_BROLL = frozenset({"handle_broll"})
+STEP_VALIDATE = frozenset({"reload_and_validate", "validate"})
+STEP_DELETE = frozenset({"delete_empty_scenes"})
+STEP_CONFIRM = frozenset({"confirm"})
+STEP_GENERATE = frozenset({"generate"})
+STEP_SUBMIT = frozenset({"final_submit"})
+
+
+class StepKind(IntEnum):
+    """Integer step kind resolved from the type string at compile time."""
+    UNKNOWN = 0
+    NAVIGATE = 1
+    WAIT = 2
+    SLEEP = 3
+    CLICK = 4
+    FILL = 5
+    PRESS = 6
+    SCENE = 7
+    BROLL = 8
+    VALIDATE = 9
+    DELETE = 10
+    CONFIRM = 11
+    GENERATE = 12
+    SUBMIT = 13
+
+
+# Separator for joining several templates into one render pass
+_RENDER_SEP = "\x00"
 
 
 class WorkflowContext:
     """Context for workflow execution."""
     
+    __slots__ = (
+        "episode_id",
+        "part_idx",
+        "template_url",
+        "scenes",
+        "config",
+        "variables",
+        "_locator_cache",
+        "_has_broll",
+    )
+    
     def __init__(
         self,
         episode_id: str = "",
@@ -53,10 +88,62 @@ class WorkflowContext:
             "part_idx": part_idx,
             "template_url": template_url,
         }
+        self._locator_cache: Dict[Tuple[int, str], Any] = {}
+        self._has_broll: Optional[bool] = None
     
     def render(self, template: str) -> str:
         """Render a template string with context variables."""
         return wf_render(template, self.variables)
+    
+    def render_many(self, templates: Dict[str, str]) -> Dict[str, str]:
+        """
+        Render several templates with one substitution pass.
+        
+        Args:
+            templates: Mapping of param name to template string
+            
+        Returns:
+            Mapping of param name to rendered string
+        """
+        if len(templates) < 2:
+            return {k: self.render(v) for k, v in templates.items()}
+        variables = self.variables
+        
+        def _repl(m):
+            k = m.group(1)
+            if k in variables:
+                return str(variables.get(k) or "")
+            return m.group(0)
+        
+        keys = list(templates)
+        joined = _RENDER_SEP.join(str(templates[k] or "") for k in keys)
+        parts = WF_VAR_PATTERN.sub(_repl, joined).split(_RENDER_SEP)
+        if len(parts) != len(keys):
+            # A template or variable contained the separator
+            return {k: self.render(v) for k, v in templates.items()}
+        return dict(zip(keys, parts))
+    
+    def has_broll_step(self, steps: List[Dict[str, Any]]) -> bool:
+        """Check (once per context) whether the workflow has a B-roll step."""
+        if self._has_broll is None:
+            self._has_broll = has_broll_step(steps)
+        return self._has_broll
+    
+    def _locator(self, page: "Page", selector: str) -> "Locator":
+        """Get a cached Locator for a selector on the given page."""
+        key = (id(page), selector)
+        loc = self._locator_cache.get(key)
+        if loc is None:
+            loc = page.locator(selector)
+            self._locator_cache[key] = loc
+        return loc
+
+
+def _r(ctx: WorkflowContext, s: Any) -> str:
+    """Render a parameter, skipping ctx.render for literal strings."""
+    if isinstance(s, str) and "{{" not in s:
+        return s
+    return ctx.render(s)
 
 
 async def execute_navigate(
@@ -65,15 +152,16 @@ async def execute_navigate(
     ctx: WorkflowContext,
 ) -> bool:
     """Execute a navigate step."""
-    url = ctx.render(params.get("url") or ctx.template_url).strip()
-    wait_until = ctx.render(params.get("wait_until") or "domcontentloaded").strip()
+    url = _r(ctx, params.get("url")) or _r(ctx, ctx.template_url).strip()
+    wait_until = _r(ctx, params.get("wait_until") or "domcontentloaded")
     timeout = wf_int(params.get("timeout_ms"), 120000)
     
     if not url:
         logger.warning("[workflow] navigate: no URL provided")
         return False
     
-    logger.info(f"[workflow] navigate: {url}")
+    logger.info("[workflow] navigate: %s", url)
+    ctx._locator_cache.clear()
     await page.goto(url, wait_until=wait_until, timeout=timeout)
     return True
 
@@ -84,14 +172,17 @@ async def execute_wait_for(
     ctx: WorkflowContext,
 ) -> bool:
     """Execute a wait_for selector step."""
-    selector = ctx.render(params.get("selector") or "").strip()
+    selector = params.get("selector")
+    if not selector:
+        return True
+    selector = _r(ctx, selector)
     if not selector:
         return True
     
     timeout = wf_int(params.get("timeout_ms"), 30000)
-    state = ctx.render(params.get("state") or "visible").strip() or "visible"
+    state = _r(ctx, params.get("state") or "visible") or "visible"
     
-    logger.info(f"[workflow] wait_for: {selector}")
+    logger.info("[workflow] wait_for: %s", selector)
     await page.wait_for_selector(selector, timeout=timeout, state=state)
     return True
 
@@ -105,10 +196,10 @@ async def execute_sleep(
     """Execute a wait/sleep step."""
     sec = wf_float(params.get("sec"), 1.0)
     
-    if gate_callback:
+    if gate_callback is not None:
         await gate_callback()
     
-    logger.debug(f"[workflow] sleep: {sec}s")
+    logger.debug("[workflow] sleep: %ss", sec)
     await asyncio.sleep(sec)
     return True
 
@@ -119,20 +210,28 @@ async def execute_click(
     ctx: WorkflowContext,
 ) -> bool:
     """Execute a click step."""
-    selector = ctx.render(params.get("selector") or "").strip()
+    selector = params.get("selector")
+    if not selector:
+        return True
+    selector = _r(ctx, selector)
     if not selector:
         return True
     
     timeout = wf_int(params.get("timeout_ms"), 8000) or None
-    loc = page.locator(selector)
+    loc = ctx._locator(page, selector)
     
-    which = ctx.render(params.get("which") or "").strip().lower()
-    if which == "last":
+    which = _r(ctx, params.get("which") or "").lower()
+    if not which:
+        pass
+    elif which == "last":
         loc = loc.last
-    elif which.isdigit():
-        loc = loc.nth(int(which))
+    else:
+        try:
+            loc = loc.nth(int(which))
+        except ValueError:
+            pass
     
-    logger.info(f"[workflow] click: {selector}")
+    logger.info("[workflow] click: %s", selector)
     
     if timeout is None:
         await loc.click()
@@ -148,14 +247,19 @@ async def execute_fill(
     ctx: WorkflowContext,
 ) -> bool:
     """Execute a fill step."""
-    selector = ctx.render(params.get("selector") or "").strip()
-    text = ctx.render(params.get("text") or "").replace("\\n", "\n")
-    
+    selector = params.get("selector")
+    if not selector:
+        return True
+    selector = _r(ctx, selector)
     if not selector:
         return True
     
-    logger.info(f"[workflow] fill: {selector}")
-    await page.locator(selector).fill(text)
+    text = _r(ctx, params.get("text") or "")
+    if "\\n" in text:
+        text = text.replace("\\n", "\n")
+    
+    logger.info("[workflow] fill: %s", selector)
+    await ctx._locator(page, selector).fill(text)
     return True
 
 
@@ -165,17 +269,105 @@ async def execute_press(
     ctx: WorkflowContext,
 ) -> bool:
     """Execute a key press step."""
-    selector = ctx.render(params.get("selector") or "").strip()
-    key = ctx.render(params.get("key") or "").strip()
-    
+    selector = params.get("selector")
+    key = params.get("key")
+    if not selector or not key:
+        return True
+    selector = _r(ctx, selector)
+    key = _r(ctx, key)
     if not selector or not key:
         return True
     
-    logger.info(f"[workflow] press: {key} on {selector}")
+    logger.info("[workflow] press: %s on %s", key, selector)
     await page.press(selector, key)
     return True
 
 
+def _build_step_tables() -> Tuple[Dict[str, StepKind], List[Optional[Tuple[Callable, bool]]]]:
+    """
+    Build the step type lookup tables.
+    
+    Returns:
+        (type string -> StepKind, StepKind -> (executor, needs_gate_callback) or None)
+    """
+    kinds: Dict[str, StepKind] = {}
+    for types, kind in (
+        (STEP_NAVIGATE, StepKind.NAVIGATE),
+        (STEP_WAIT, StepKind.WAIT),
+        (STEP_SLEEP, StepKind.SLEEP),
+        (STEP_CLICK, StepKind.CLICK),
+        (STEP_FILL, StepKind.FILL),
+        (STEP_PRESS, StepKind.PRESS),
+        (STEP_SCENE, StepKind.SCENE),
+        (STEP_BROLL, StepKind.BROLL),
+        (STEP_VALIDATE, StepKind.VALIDATE),
+        (STEP_DELETE, StepKind.DELETE),
+        (STEP_CONFIRM, StepKind.CONFIRM),
+        (STEP_GENERATE, StepKind.GENERATE),
+        (STEP_SUBMIT, StepKind.SUBMIT),
+    ):
+        for t in types:
+            kinds[t] = kind
+    
+    table: List[Optional[Tuple[Callable, bool]]] = [None] * len(StepKind)
+    table[StepKind.NAVIGATE] = (execute_navigate, False)
+    table[StepKind.WAIT] = (execute_wait_for, False)
+    table[StepKind.SLEEP] = (execute_sleep, True)
+    table[StepKind.CLICK] = (execute_click, False)
+    table[StepKind.FILL] = (execute_fill, False)
+    table[StepKind.PRESS] = (execute_press, False)
+    return kinds, table
+
+
+_STR_TO_KIND, _STEP_TABLE_BY_KIND = _build_step_tables()
+
+# Basic step type string -> (executor, needs_gate_callback)
+_STEP_TABLE: Dict[str, Tuple[Callable, bool]] = {
+    t: _STEP_TABLE_BY_KIND[kind]
+    for t, kind in _STR_TO_KIND.items()
+    if _STEP_TABLE_BY_KIND[kind] is not None
+}
+
+
+def _make_trampoline(
+    executor: Callable,
+    needs_gate: bool,
+) -> Callable[["Page", Dict[str, Any], WorkflowContext], Awaitable[bool]]:
+    """
+    Build a runner specialized for one step kind.
+    
+    The gate-forwarding shape is fixed when the runner is built, so no
+    per-call type tests are needed. The gate itself is awaited by
+    execute_step, so executors that accept one receive None.
+    """
+    if needs_gate:
+        async def run(page, params, ctx):
+            return await executor(page, params, ctx, None)
+    else:
+        async def run(page, params, ctx):
+            return await executor(page, params, ctx)
+    return run
+
+
+_TRAMPOLINES_BY_KIND: List[Optional[Callable]] = [
+    _make_trampoline(*entry) if entry else None
+    for entry in _STEP_TABLE_BY_KIND
+]
+
+# Executor -> numeric params coerced at compile time: (name, parser, default)
+_NUMERIC_PARAMS: Dict[Callable, Tuple[Tuple[str, Callable, Any], ...]] = {
+    execute_navigate: (("timeout_ms", wf_int, 120000),),
+    execute_wait_for: (("timeout_ms", wf_int, 30000),),
+    execute_sleep: (("sec", wf_float, 1.0),),
+    execute_click: (("timeout_ms", wf_int, 8000),),
+}
+
+_COMPLEX_TYPES = (
+    STEP_SCENE | STEP_BROLL | STEP_VALIDATE |
+    STEP_DELETE | STEP_CONFIRM | STEP_GENERATE | STEP_SUBMIT
+)
+
+
 def get_step_executor(step_type: str) -> Optional[Callable]:
     """
     Get the executor function for a step type.
@@ -186,26 +378,78 @@ def get_step_executor(step_type: str) -> Optional[Callable]:
     Returns:
         Executor function or None if not found
     """
-    if step_type in STEP_NAVIGATE:
-        return execute_navigate
-    if step_type in STEP_WAIT:
-        return execute_wait_for
-    if step_type in STEP_SLEEP:
-        return execute_sleep
-    if step_type in STEP_CLICK:
-        return execute_click
-    if step_type in STEP_FILL:
-        return execute_fill
-    if step_type in STEP_PRESS:
-        return execute_press
-    
     # Complex steps are handled by the main automation class
-    return None
+    entry = _STEP_TABLE.get(step_type)
+    return entry[0] if entry else None
+
+
+# String params whose surrounding whitespace is never significant
+_STRIPPED_PARAMS = frozenset({"url", "wait_until", "selector", "state", "which", "key"})
+
+# Shared fallback for steps without params; never mutated
+_EMPTY_PARAMS: Dict[str, Any] = {}
+
+# A workflow step normalized once ahead of execution:
+#   type       - stripped step type string
+#   kind       - StepKind resolved from the type string
+#   params     - parameters dict (never None)
+#   executor   - basic step executor, or None for complex steps
+#   needs_gate - whether the executor takes the gate callback
+#   templated  - names of string params containing {{placeholders}}
+#   run        - specialized runner for the step type, or None
+CompiledStep = namedtuple("CompiledStep", "type kind params executor needs_gate templated run")
+
+
+def compile_step(step: Dict[str, Any]) -> CompiledStep:
+    """
+    Normalize a raw step definition for repeated execution.
+    
+    Numeric params (timeouts, sleep seconds) are parsed and literal
+    selector-like params are stripped here once, so executors hit the
+    cheap already-parsed path. Executors still accept raw params.
+    
+    Args:
+        step: Step definition dictionary
+        
+    Returns:
+        CompiledStep with resolved executor and template metadata
+    """
+    step_type = str(step.get("type") or "").strip()
+    params = p if isinstance((p := step.get("params")), dict) else _EMPTY_PARAMS
+    kind = _STR_TO_KIND.get(step_type, StepKind.UNKNOWN)
+    executor, needs_gate = _STEP_TABLE_BY_KIND[kind] or (None, False)
+    if executor is not None:
+        params = dict(params)
+        for name, parse, default in _NUMERIC_PARAMS.get(executor, ()):
+            params[name] = parse(params.get(name), default)
+        for k in _STRIPPED_PARAMS:
+            v = params.get(k)
+            if isinstance(v, str) and "{{" not in v:
+                params[k] = v.strip()
+    templated = frozenset(
+        k for k, v in params.items()
+        if isinstance(v, str) and "{{" in v
+    )
+    run = _TRAMPOLINES_BY_KIND[kind]
+    return CompiledStep(step_type, kind, params, executor, needs_gate, templated, run)
+
+
+def compile_workflow(steps: List[Dict[str, Any]]) -> List[CompiledStep]:
+    """
+    Compile all dictionary steps of a workflow before running it.
+    
+    Args:
+        steps: List of step definitions
+        
+    Returns:
+        List of compiled steps (non-dict entries are dropped)
+    """
+    return [compile_step(s) for s in steps or [] if isinstance(s, dict)]
 
 
 async def execute_step(
     page: "Page",
-    step: Dict[str, Any],
+    step: Any,
     ctx: WorkflowContext,
     gate_callback: Optional[Callable[[], Awaitable[None]]] = None,
 ) -> bool:
@@ -217,32 +461,35 @@ async def execute_step(
     
     Args:
         page: Playwright Page object
-        step: Step definition dictionary
+        step: CompiledStep, or a raw step definition dictionary
         ctx: Workflow context
         gate_callback: Optional pause/cancel callback
         
     Returns:
         True if step executed successfully, None if not handled
     """
-    step_type = str(step.get("type") or "").strip()
-    params = step.get("params") if isinstance(step.get("params"), dict) else {}
+    if not isinstance(step, CompiledStep):
+        step = compile_step(step)
     
-    executor = get_step_executor(step_type)
-    
-    if executor is None:
+    run = step.run
+    if run is None:
         # Not a basic step - should be handled elsewhere
         return None
     
-    if gate_callback:
+    params = step.params
+    if step.templated:
+        params = dict(params)
+        rendered = ctx.render_many({k: params[k] for k in step.templated})
+        for k, v in rendered.items():
+            params[k] = v.strip() if k in _STRIPPED_PARAMS else v
+    
+    if gate_callback is not None:
         await gate_callback()
     
     try:
-        if step_type in STEP_SLEEP:
-            return await executor(page, params, ctx, gate_callback)
-        else:
-            return await executor(page, params, ctx)
+        return await run(page, params, ctx)
     except Exception as e:
-        logger.error(f"[workflow] step {step_type} failed: {e}")
+        logger.error("[workflow] step %s failed: %s", step.type, e)
         raise
 
 
@@ -258,11 +505,15 @@ def is_complex_step(step_type: str) -> bool:
     Returns:
         True if step is complex
     """
-    complex_types = (
-        STEP_SCENE | STEP_BROLL | STEP_VALIDATE | 
-        STEP_DELETE | STEP_CONFIRM | STEP_GENERATE | STEP_SUBMIT
-    )
-    return step_type in complex_types
+    return step_type in _COMPLEX_TYPES
+
+
+def _is_valid_step(step: Any) -> bool:
+    """Check a single step without building error messages."""
+    if not isinstance(step, dict) or not step.get("type"):
+        return False
+    params = step.get("params")
+    return params is None or isinstance(params, dict)
 
 
 def validate_workflow(steps: List[Dict[str, Any]]) -> List[str]:
@@ -275,12 +526,14 @@ def validate_workflow(steps: List[Dict[str, Any]]) -> List[str]:
     Returns:
         List of validation error messages (empty if valid)
     """
-    errors = []
-    
     if not steps:
-        errors.append("Workflow has no steps")
-        return errors
+        return ["Workflow has no steps"]
+    
+    # Fast path: well-formed workflows pass a single short-circuiting scan
+    if all(_is_valid_step(step) for step in steps):
+        return []
     
+    errors = []
     for i, step in enumerate(steps):
         if not isinstance(step, dict):
             errors.append(f"Step {i}: not a dictionary")
@@ -307,7 +560,8 @@ def has_broll_step(steps: List[Dict[str, Any]]) -> bool:
     Returns:
         True if handle_broll step exists
     """
-    for step in steps:
-        if isinstance(step, dict) and step.get("type") in STEP_BROLL:
-            return True
-    return False
+    return any(
+        step.get("type") in STEP_BROLL
+        for step in steps
+        if isinstance(step, dict)
+    )
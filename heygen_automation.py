@@ -1,5 +1,10 @@
 import asyncio
+import contextlib
+import copy
+import csv
+import hashlib
 import pandas as pd
+import pickle
 import random
 from playwright.async_api import async_playwright, Page, Locator
 import os
@@ -8,6 +13,9 @@ import re
 import argparse
 import subprocess
 import sys
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse
 from typing import Awaitable, Callable, Any
 from ui.step_wrapper import step
 from ui.logger import logger
@@ -22,8 +30,207 @@ from core.broll import (
     handle_nano_banano
 )
 from core.browser import prepare_canvas_for_broll, human_coordinate_click, human_fast_center_click
+from core.browser import selector_exists, locator_exists, wait_for_focused_text
 from core.scenes import delete_empty_scenes as delete_empty_scenes_core
 from utils.clipboard import parse_nano_banano_prompt
+from utils.helpers import normalize_text_for_compare as _normalize_for_compare
+
+_RX_WS = re.compile(r"\s+")
+_RX_TEXT_LABEL = re.compile(r'^\s*text_(\d+)\s*$')
+_RX_MEDIA_HEADER = re.compile(r"^\s*(Медиа|Media)\s*$", re.I)
+_RX_NO_RESULTS = re.compile(r"\b(No\s+data|No\s+results\s+found)\b", re.I)
+_RX_SPEAKER_COMPACT = re.compile(r"[^a-zA-Z0-9]+")
+_RX_SPEAKER_SAFE = re.compile(r"[^a-zA-Z0-9_\-]+")
+# Версия формата кэша разбора CSV: поднимать при любом изменении загрузки или нормализации данных
+_CSV_CACHE_SCHEMA = 2
+_REPORT_KEYS = ('validation_missing', 'broll_skipped', 'broll_no_results', 'broll_errors', 'manual_intervention')
+_RX_PROJECTS_URL = re.compile(r"/projects")
+_SET_AS_BG_NAMES = r"Set as BG|Set as Background|Set as background|Make background|Сделать фоном|Сделать фон|Установить как фон"
+_RX_SET_AS_BG = re.compile(rf"({_SET_AS_BG_NAMES})", re.I)
+_RX_SET_AS_BG_EXACT = re.compile(rf"^({_SET_AS_BG_NAMES})$", re.I)
+_RX_BG_ATTACHED = re.compile(r"^(Detach from BG|Change BG|Detach|Change BG)$", re.I)
+_RX_BG_COLOR = re.compile(r"^(BG\s*Color|BG\s*Colour|Цвет\s*BG|BG\s*Цвет)$", re.I)
+_RX_DETACH_BG = re.compile(r"^(Detach from BG|Открепить от BG|Открепить от фона)$", re.I)
+_RX_BROLL_SEARCH = re.compile(r"(Искать видео онлайн|Search videos online)", re.I)
+_RX_TITLE_RU = re.compile(r"Без названия — видео", re.I)
+_RX_TITLE_EN = re.compile(r"Untitled", re.I)
+_RX_ENHANCE_VOICE_EXACT = re.compile(r'^\s*Enhance Voice\s*$')
+_RX_ENHANCE_VOICE = re.compile(r'Enhance Voice|Усилить голос')
+_RX_SUBMIT = re.compile(r'Отправить|Submit', re.I)
+_RX_SAVED_RU = re.compile(r'^\s*Сохранено\s*$')
+_RX_SAVED_EN = re.compile(r'^\s*Saved\s*$')
+_RX_SAVE_ITEM = re.compile(r'^\s*Сохранить\s*$')
+
+_SCENE_SPAN_SEL = 'span[data-node-view-content-react]'
+_EDITOR_SEL = 'div[contenteditable="true"][role="textbox"][translate="no"][tabindex="0"]'
+_GENERATE_POPUP_SEL = 'div:has-text("Сгенерировать видео"), div:has-text("Generate video")'
+_FINAL_TITLE_INPUT_SEL = 'input[placeholder="Без названия — видео"]'
+_BROLL_SEARCH_SELECTORS = (
+    'input[placeholder*="Искать"][placeholder*="онлайн"]',
+    'input[placeholder="Искать видео онлайн"]',
+    'input[placeholder="Искать Изображение онлайн"]',
+    'input[placeholder*="Search"][placeholder*="online"]',
+    'input[placeholder="Search videos online"]',
+    'input[type="search"]',
+)
+
+
+# Находит span сцены по точной метке, прокручивает его в центр и возвращает текст
+_JS_PROBE_SCENE_SPAN = """
+(label) => {
+  const spans = document.querySelectorAll('span[data-node-view-content-react]');
+  for (const el of spans) {
+    const t = (el.textContent || '').trim();
+    if (t === label) {
+      el.scrollIntoView({ block: 'center', behavior: 'instant' });
+      return t;
+    }
+  }
+  return null;
+}
+"""
+
+# Проверка текста редактора на стороне страницы: та же нормализация, что и normalize_text_for_compare
+_JS_VERIFY_EDITOR_TEXT = """
+({ sel, expected, strip }) => {
+  const el = document.querySelector(sel);
+  if (!el) return 'missing';
+  let t = el.innerText || '';
+  if (strip) t = t.replace(/\\[[^\\]]*\\]/g, '');
+  t = t.replace(/\\s+/g, ' ').trim();
+  return t.includes(expected) ? 'ok' : 'mismatch';
+}
+"""
+
+# Наличие кнопок Enhance Voice одним запросом вместо нескольких count()
+_JS_ENHANCE_VOICE_STATE = """
+() => {
+  const byId = Array.from(document.querySelectorAll('button#voice-enhancement-jeFjSzUn'))
+    .some((b) => (b.textContent || '').includes('Enhance Voice'));
+  const director = Array.from(document.querySelectorAll('button'))
+    .filter((b) => b.querySelector('iconpark-icon[name="director-mode"]'));
+  const exact = director.some((b) => /^\\s*Enhance Voice\\s*$/.test(b.textContent || ''));
+  const any = director.some((b) => /Enhance Voice|Усилить голос/.test(b.textContent || ''));
+  return { byId, exact, any };
+}
+"""
+
+# Есть ли кнопка сохранения с иконкой saved
+_JS_SAVED_ICON_BUTTON = """
+() => Array.from(document.querySelectorAll('iconpark-icon[name="saved"]')).some((i) => !!i.closest('button'))
+"""
+
+# innerText всех span'ов сцен одним запросом
+_JS_SCENE_SPAN_TEXTS = """
+(sel) => Array.from(document.querySelectorAll(sel), (e) => e.innerText || '')
+"""
+
+# Состояние выдачи B-roll: src первой карточки и наличие «No data» в активной вкладке
+_JS_BROLL_RESULTS_STATE = """
+() => {
+  const img = document.querySelector('div:not(.tw-hidden) .tw-grid-cols-2 img');
+  const src = img ? (img.currentSrc || img.src || '') : '';
+  const rx = /\\b(No\\s+data|No\\s+results\\s+found)\\b/i;
+  const noData = Array.from(document.querySelectorAll('[role="tabpanel"][data-state="active"] div:not(.tw-hidden)'))
+    .some((d) => d.offsetParent !== null && rx.test(d.textContent || ''));
+  return { src, noData };
+}
+"""
+
+# Первая подходящая карточка выдачи (правая половина экрана, загруженная, видимая) и её
+# bounding box за один проход — вместо bounding_box/naturalWidth/is_visible на каждую карточку
+_JS_FIRST_BROLL_CARD = """
+(els, limit) => {
+  const vw = window.innerWidth || 0;
+  const vh = window.innerHeight || 0;
+  for (let i = 0; i < Math.min(els.length, limit); i++) {
+    const el = els[i];
+    const r = el.getBoundingClientRect();
+    if (!r.width || !r.height) continue;
+    if (vw && r.x <= vw * 0.5) continue;
+    if ((el.naturalWidth || 0) <= 1) continue;
+    const st = getComputedStyle(el);
+    if (st.visibility === 'hidden' || st.display === 'none') continue;
+    const inViewport = r.top >= 0 && r.bottom <= vh && r.left >= 0 && r.right <= vw;
+    return { index: i, inViewport, box: { x: r.x, y: r.y, width: r.width, height: r.height } };
+  }
+  return null;
+}
+"""
+
+# Ждём устоявшуюся новую выдачу: другие карточки или появившееся «No data»
+_JS_BROLL_RESULTS_CHANGED = """
+(prev) => {
+  const img = document.querySelector('div:not(.tw-hidden) .tw-grid-cols-2 img');
+  const src = img ? (img.currentSrc || img.src || '') : '';
+  if (src && src !== prev.src) return true;
+  if (prev.noData) return false;
+  const rx = /\\b(No\\s+data|No\\s+results\\s+found)\\b/i;
+  return Array.from(document.querySelectorAll('[role="tabpanel"][data-state="active"] div:not(.tw-hidden)'))
+    .some((d) => d.offsetParent !== null && rx.test(d.textContent || ''));
+}
+"""
+
+
+def _applescript_str(value: str) -> str:
+    """Строковый литерал AppleScript: экранируем обратный слэш и кавычки"""
+    return '"' + str(value or "").replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _spawn_osascript(script: str) -> None:
+    """Запустить AppleScript без ожидания; вне macOS osascript нет — процесс не порождаем"""
+    if sys.platform != "darwin":
+        return
+    try:
+        subprocess.Popen(['osascript', '-e', script], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except Exception:
+        pass
+
+
+def _extract_port(url: str, default: int = 9222) -> int:
+    """Порт из CDP URL (http://localhost:9222 -> 9222), иначе default"""
+    try:
+        return urlparse(str(url or '')).port or default
+    except Exception:
+        return default
+
+
+@lru_cache(maxsize=32)
+def _names_pattern(names_raw: str) -> "re.Pattern[str]":
+    names = [n.strip() for n in names_raw.split('|') if n.strip()]
+    return re.compile('|'.join(re.escape(n) for n in names) if names else r'Сгенерировать|Generate')
+
+
+_RX_WF_VAR = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}")
+
+
+@lru_cache(maxsize=512)
+def _wf_template(template: str) -> Callable[[dict], str]:
+    """Скомпилировать шаблон параметра {{var}} в функцию ctx -> str (неизвестные ключи не трогаем)"""
+    parts = _RX_WF_VAR.split(template)
+    if len(parts) == 1:
+        return lambda ctx: template
+    lits = parts[0::2]
+    keys = parts[1::2]
+    tokens = [m.group(0) for m in _RX_WF_VAR.finditer(template)]
+    tail = lits[-1]
+    pairs = tuple(zip(lits, keys, tokens))
+
+    def _render(ctx: dict) -> str:
+        out = []
+        for literal, key, token in pairs:
+            out.append(literal)
+            out.append(str(ctx.get(key) or "") if key in ctx else token)
+        out.append(tail)
+        return "".join(out)
+
+    return _render
+
+
+@lru_cache(maxsize=256)
+def _label_pattern(label: str, flags: int = 0) -> "re.Pattern[str]":
+    return re.compile(rf'^\s*{re.escape(label)}\s*$', flags)
+
 
 class HeyGenAutomation:
     def __init__(self, csv_path: str, config: dict, browser=None, playwright=None):
@@ -38,6 +245,12 @@ class HeyGenAutomation:
         """
         self.csv_path = csv_path
         self.df = None
+        self._index_df = None
+        self._rows_by_ep = {}
+        self._rows_by_ep_part = {}
+        self._parts_by_ep = {}
+        self._template_url_by_ep = {}
+        self._episode_data_cache = {}
         self.config = config or {}
         self.browser = browser
         self.playwright = playwright
@@ -65,6 +278,8 @@ class HeyGenAutomation:
         self.media_source = str(self.config.get('media_source', 'all')).lower()
         self.enable_notifications = bool(self.config.get('enable_notifications', False))
         self.verify_scene_after_insert = bool(self.config.get('verify_scene_after_insert', False))
+        # Полностраничный скриншот после каждого успешного B-roll — только для отладки
+        self.broll_success_screenshots = bool(self.config.get('broll_success_screenshots', False))
         self._broll_delay_range = (
             float(self.config.get('broll_step_delay_min_sec', 0.25)),
             float(self.config.get('broll_step_delay_max_sec', 0.55)),
@@ -73,16 +288,32 @@ class HeyGenAutomation:
         self.broll_after_make_bg_min_wait_sec = float(self.config.get('broll_after_make_bg_min_wait_sec', 0.9))
         self._on_notice = None
         self._on_step = None
+        self._verbose = bool(self.config.get('verbose', True))
+        self._refresh_scene_flags()
         self.csv_columns = self.config.get('csv_columns') or {}
         self.episodes_to_process = self.config.get('episodes_to_process') or []
         self.report = None
+        self.reports = {}
+        # Живые статусы частей, обрабатываемых во вкладках: (episode_id, part_idx) -> TaskStatus
+        self.task_statuses = {}
+        self._status_sink = None
         self.pause_events = []
+        self._gate_clean = False
+        self._log_buffered = False
+        self._log_buf = []
         self._current_episode_id = None
         self._current_part_idx = None
         self._last_error = ""
         self._page = None
+        self._bound_page = None
+        self._page_locs = {}
+        self._broll_query_cache = {}
+        self._broll_panel_state = None
+        self._cached_generate_selector = {}
         self.playwright_context = None
         self._owns_browser_process = False
+        self._browser_lock = None
+        self._hydrate_config()
         self.task_status: TaskStatus | None = None
         try:
             os.makedirs("debug/screenshots", exist_ok=True)
@@ -124,7 +355,7 @@ class HeyGenAutomation:
         s = str(speaker).strip()
         if not s:
             return None
-        compact = re.sub(r"[^a-zA-Z0-9]+", " ", s).strip().lower()
+        compact = _RX_SPEAKER_COMPACT.sub(" ", s).strip().lower()
         mapping = {
             "dr peter": "Dr_Peter",
             "doctor peter": "Dr_Peter",
@@ -134,7 +365,7 @@ class HeyGenAutomation:
         }
         if compact in mapping:
             return mapping[compact]
-        safe = re.sub(r"[^a-zA-Z0-9_\-]+", "_", s).strip("_")
+        safe = _RX_SPEAKER_SAFE.sub("_", s).strip("_")
         return safe or None
 
     async def _scroll_scene_list_until_label(
@@ -144,9 +375,7 @@ class HeyGenAutomation:
         max_scrolls: int = 40,
         delta_px: int = 700,
     ) -> bool:
-        target = page.locator('span[data-node-view-content-react]').filter(
-            has_text=re.compile(rf'^\s*{re.escape(label)}\s*$', re.I)
-        )
+        target = self._scene_span(page, label, re.I)
         try:
             if await target.count() > 0:
                 return True
@@ -278,36 +507,6 @@ class HeyGenAutomation:
         except Exception:
             return False
 
-    async def _ensure_min_unfilled_scenes_visible(
-        self,
-        page: Page,
-        current_scene_idx: int,
-        min_visible: int = 4,
-        max_steps: int = 25,
-        delta_px: int = 650,
-    ) -> None:
-        """
-        Scroll the current scene to the center of the viewport.
-        This handles both early scenes (providing context above) and late scenes (avoiding bounce at bottom).
-        """
-        try:
-            text_label = f"text_{current_scene_idx}"
-            
-            # Find the specific scene element
-            span_locator = page.locator('span[data-node-view-content-react]').filter(
-                has_text=re.compile(rf'^\s*{re.escape(text_label)}\s*$')
-            )
-            
-            if await span_locator.count() > 0:
-                # Scroll the element to the center of the view
-                await span_locator.first.evaluate(
-                    "(el) => el.scrollIntoView({ block: 'center', behavior: 'instant' })"
-                )
-                await asyncio.sleep(0.1)
-                
-        except Exception:
-            pass
-
     def _generation_enabled(self) -> bool:
         return bool(self.config.get("enable_generation", True))
 
@@ -316,10 +515,10 @@ class HeyGenAutomation:
         if not t:
             return True
         await self._await_gate()
-        locator = page.get_by_role("textbox", name=re.compile(r"Без названия — видео", re.I))
+        locator = page.get_by_role("textbox", name=_RX_TITLE_RU)
         try:
             if await locator.count() == 0:
-                locator = page.get_by_role("textbox", name=re.compile(r"Untitled", re.I))
+                locator = page.get_by_role("textbox", name=_RX_TITLE_EN)
         except Exception:
             pass
         try:
@@ -355,32 +554,98 @@ class HeyGenAutomation:
         await asyncio.sleep(0.05)
         return True
 
-    def normalize_text_for_compare(self, text: str) -> str:
+    def _refresh_scene_flags(self):
+        """Считать флаги, нужные на каждой сцене (config может обновиться между задачами)"""
+        overrides = self.config.get('step_overrides') or {}
+        self._fill_scene_overrides = overrides.get('fill_scene') or {}
+        self._generate_overrides = overrides.get('click_generate_button') or {}
+        self._enable_enhance_voice = bool(self.config.get('enable_enhance_voice', False))
+        try:
+            self._extra_fill_delay = float(self._fill_scene_overrides.get('delay_sec', 0))
+        except Exception:
+            self._extra_fill_delay = 0.0
         try:
-            t = str(text or '')
-            if bool(self.config.get('enable_enhance_voice', False)):
-                t = re.sub(r"\[[^\]]*\]", "", t)
-            t = re.sub(r"\s+", " ", t).strip()
-            return t
+            self._extra_generate_delay = float(self._generate_overrides.get('delay_sec', 0))
         except Exception:
-            return str(text or '').strip()
+            self._extra_generate_delay = 0.0
+        names_raw = str(self.config.get('generate_button_name', 'Сгенерировать|Generate'))
+        self._gen_cfg = {
+            'strategy': str(self.config.get('generate_button_selector_strategy', 'text')).lower(),
+            'names_raw': names_raw,
+            'names': tuple(n.strip() for n in names_raw.split('|') if n.strip()),
+            'name_re': _names_pattern(names_raw),
+            'custom_sel': str(self.config.get('generate_button_selector_custom', '') or ''),
+            'icon_name': str(self.config.get('generate_button_icon_name', '') or ''),
+        }
+
+    def _hydrate_config(self):
+        """Разложить настройки браузера/сессии по типизированным атрибутам (вызывается на каждую часть)"""
+        cfg = self.config
+        self._cfg_browser = (cfg.get('browser') or 'chrome').lower()
+        self._cfg_chrome_cdp = cfg.get('chrome_cdp_url') or 'http://localhost:9222'
+        self._cfg_multilogin_cdp = cfg.get('multilogin_cdp_url')
+        self._cfg_profiles = cfg.get('profiles') or {}
+        self._cfg_profile_to_use = (cfg.get('profile_to_use') or '').strip()
+        self._cfg_force_embedded = bool(cfg.get('force_embedded_browser', False))
+        self._cfg_debug_keep_open = bool(cfg.get('debug_keep_browser_open_on_error', False))
+        self._cfg_chrome_profile_path = str(cfg.get('chrome_profile_path', '~/chrome_automation'))
+        try:
+            self._cfg_playwright_timeout_ms = float(cfg.get('playwright_timeout_ms', 5000))
+        except Exception:
+            self._cfg_playwright_timeout_ms = 5000.0
+        wf_steps = cfg.get('workflow_steps') or []
+        self._cfg_workflow_steps = wf_steps if isinstance(wf_steps, list) else []
+        # Порты CDP по URL профилей и chrome_cdp_url — без разбора URL при каждом подключении
+        cdp_urls = [self._cfg_chrome_cdp]
+        cdp_urls += [(pconf or {}).get('cdp_url') for pconf in self._cfg_profiles.values()]
+        self._cdp_ports = {url: _extract_port(url) for url in cdp_urls if url}
+
+    def normalize_text_for_compare(self, text: str, strip_brackets: bool | None = None) -> str:
+        if strip_brackets is None:
+            strip_brackets = self._enable_enhance_voice
+        return _normalize_for_compare(text, strip_brackets)
 
     def set_hooks(self, on_notice=None, on_step=None):
         self._on_notice = on_notice
         self._on_step = on_step
 
     def _emit_notice(self, msg: str):
+        if msg is None or (not self._verbose and self._on_notice is None):
+            return
         try:
-            if msg is None:
-                return
             m = str(msg)
-            print(m)
+            if self._verbose:
+                self._log(m)
             if self._on_notice:
                 self._on_notice(m)
         except Exception:
             pass
 
+    def _log(self, msg: str):
+        """Вывод в консоль; внутри блока сцены строки копятся и пишутся одним write на границе сцены"""
+        if not self._log_buffered:
+            if self._log_buf:
+                self._flush_log()
+            print(msg)
+            return
+        self._log_buf.append(msg)
+        if len(self._log_buf) >= 50:
+            self._flush_log()
+
+    def _flush_log(self):
+        buf = self._log_buf
+        if not buf:
+            return
+        self._log_buf = []
+        try:
+            sys.stdout.write("\n".join(buf) + "\n")
+            sys.stdout.flush()
+        except Exception:
+            pass
+
     def _emit_step(self, payload: dict):
+        if self._on_step is None:
+            return
         try:
             if self._on_step:
                 p = dict(payload or {})
@@ -392,22 +657,59 @@ class HeyGenAutomation:
         except Exception:
             pass
 
+    @contextlib.contextmanager
+    def _scene_log(self):
+        """Копить вывод _log внутри блока сцены и сбросить его одним write на выходе"""
+        prev = self._log_buffered
+        self._log_buffered = True
+        try:
+            yield
+        finally:
+            self._log_buffered = prev
+            self._flush_log()
+
+    @contextlib.asynccontextmanager
+    async def _scene_gate(self):
+        """Проверить паузу один раз на сцену: внутри блока _await_gate не ждёт"""
+        await self._await_gate()
+        prev = self._gate_clean
+        self._gate_clean = True
+        try:
+            yield
+        finally:
+            self._gate_clean = prev
+
     async def _await_gate(self):
-        evs = getattr(self, "pause_events", None)
+        if self._gate_clean:
+            return
+        evs = self.pause_events
         if not evs:
             return
-        for ev in list(evs):
+        # Внешние события (глобальная пауза + пауза задачи): ждём только сброшенные
+        for ev in tuple(evs):
             try:
-                await ev.wait()
+                if not ev.is_set():
+                    await ev.wait()
             except asyncio.CancelledError:
                 raise
             except Exception:
                 continue
 
+    def _set_task_status(self, status: TaskStatus) -> TaskStatus:
+        """Назначить статус задачи; воркер вкладки сразу отдаёт его родителю"""
+        self.task_status = status
+        sink = self._status_sink
+        if sink is not None:
+            try:
+                sink(status)
+            except Exception:
+                pass
+        return status
+
     async def perform_step(self, name: str, action_func: Callable[[], Awaitable[Any]], critical: bool = True):
         step_rec = AutomationStep(name=name, status=StepStatus.PENDING)
         if self.task_status is None:
-            self.task_status = TaskStatus(task_id=f"{self._current_episode_id}:{self._current_part_idx}")
+            self._set_task_status(TaskStatus(task_id=f"{self._current_episode_id}:{self._current_part_idx}"))
         self.task_status.steps.append(step_rec)
         try:
             logger.info(f"[{name}] start")
@@ -467,70 +769,31 @@ class HeyGenAutomation:
         except Exception as e:
             self._emit_notice(f"⚠️ screenshot failed: {e}")
 
-    def _block_generation_reason(self) -> str:
+    def _generation_gate(self) -> tuple[bool, str]:
+        """Один проход по отчёту: (блокировать ли генерацию, причина)"""
         if not self.report:
-            return ""
+            return False, ""
         reasons = []
         try:
-            if self.report.get('validation_missing'):
-                reasons.append(f"несоответствия: {len(self.report.get('validation_missing') or [])}")
-        except Exception:
-            pass
-        try:
-            if self.report.get('broll_skipped'):
-                reasons.append(f"пропуски B-roll: {len(self.report.get('broll_skipped') or [])}")
-        except Exception:
-            pass
-        try:
-            if self.report.get('broll_errors'):
-                reasons.append(f"ошибки B-roll: {len(self.report.get('broll_errors') or [])}")
-        except Exception:
-            pass
-        try:
-            if self.report.get('broll_no_results'):
-                reasons.append(f"B-roll без результатов: {len(self.report.get('broll_no_results') or [])}")
+            for key, label in (
+                ('validation_missing', "несоответствия"),
+                ('broll_skipped', "пропуски B-roll"),
+                ('broll_errors', "ошибки B-roll"),
+                ('broll_no_results', "B-roll без результатов"),
+            ):
+                items = self.report.get(key)
+                if items:
+                    reasons.append(f"{label}: {len(items)}")
         except Exception:
             pass
         try:
             if self.task_status and self.task_status.steps:
-                skipped = [s for s in self.task_status.steps if s.status == StepStatus.SKIPPED]
+                skipped = sum(1 for s in self.task_status.steps if s.status == StepStatus.SKIPPED)
                 if skipped:
-                    reasons.append(f"пропущенные шаги: {len(skipped)}")
-        except Exception:
-            pass
-        return "; ".join(reasons)
-
-    def _should_block_generation(self) -> bool:
-        if not self.report:
-            return False
-        try:
-            if self.report.get('validation_missing'):
-                return True
-        except Exception:
-            pass
-        try:
-            if self.report.get('broll_skipped'):
-                return True
-        except Exception:
-            pass
-        try:
-            if self.report.get('broll_errors'):
-                return True
+                    reasons.append(f"пропущенные шаги: {skipped}")
         except Exception:
             pass
-        try:
-            if self.report.get('broll_no_results'):
-                return True
-        except Exception:
-            pass
-        try:
-            if self.task_status and self.task_status.steps:
-                for s in self.task_status.steps:
-                    if s.status == StepStatus.SKIPPED:
-                        return True
-        except Exception:
-            pass
-        return False
+        return bool(reasons), "; ".join(reasons)
 
     async def _broll_pause(self, base: float = 0.0):
         try:
@@ -543,6 +806,7 @@ class HeyGenAutomation:
             remaining = float(base) + random.uniform(a, b)
             if remaining <= 0:
                 return
+            # Пауза начинается сбросом события, а его не дождаться — проверяем гейт кусками по 200 мс
             while remaining > 0:
                 await self._await_gate()
                 chunk = 0.2 if remaining > 0.2 else remaining
@@ -556,36 +820,53 @@ class HeyGenAutomation:
             except Exception:
                 pass
 
-    async def _try_click(self, loc, page: Page, timeout_ms: int = 8000) -> bool:
+    async def _try_click(
+        self,
+        loc,
+        page: Page,
+        timeout_ms: int = 8000,
+        max_attempts: int = 3,
+        base_ms: int = 300,
+        max_ms: int = 3000,
+    ) -> bool:
         try:
             await loc.scroll_into_view_if_needed()
         except asyncio.CancelledError:
             raise
         except Exception:
             pass
-        try:
-            await loc.click(timeout=timeout_ms)
-            return True
-        except asyncio.CancelledError:
-            raise
-        except Exception:
-            pass
-        try:
-            await loc.click(timeout=timeout_ms, force=True)
-            return True
-        except asyncio.CancelledError:
-            raise
-        except Exception:
-            pass
-        try:
-            h = await loc.element_handle()
-            if h:
-                await page.evaluate("(el) => el && el.click && el.click()", h)
+
+        async def _normal(t):
+            await loc.click(timeout=t)
+
+        async def _force(t):
+            await loc.click(timeout=t, force=True)
+
+        async def _js(t):
+            h = await loc.element_handle(timeout=t)
+            if not h:
+                raise RuntimeError("no element handle")
+            await page.evaluate("(el) => el && el.click && el.click()", h)
+
+        strategies = (_normal, _force, _js)
+        attempts = max(1, int(max_attempts))
+        for attempt in range(attempts):
+            if attempt >= len(strategies):
+                # Стратегии перебираются сразу; бэкофф — только для повторов последней из них
+                delay_ms = min(max_ms, base_ms * 2 ** (attempt - len(strategies) + 1)) * (1 + random.uniform(0, 0.5))
+                await asyncio.sleep(delay_ms / 1000.0)
+            if attempt > 0:
+                await self._await_gate()
+            try:
+                await strategies[min(attempt, len(strategies) - 1)](int(timeout_ms))
+                if attempt > 0:
+                    logger.debug(f"[try_click] ok after {attempt + 1} attempts")
                 return True
-        except asyncio.CancelledError:
-            raise
-        except Exception:
-            pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+        logger.debug(f"[try_click] failed after {attempts} attempts")
         return False
 
     @step("open_media_panel")
@@ -596,24 +877,46 @@ class HeyGenAutomation:
         # Delegate to core.broll implementation which has been updated with fixes
         return await select_video_tab(page, gate_callback=self._await_gate)
 
+    def _bind_page(self, page: Page) -> dict:
+        """Locator'ы, которые не зависят от сцены, строятся один раз на страницу"""
+        if self._bound_page is page and self._page_locs:
+            return self._page_locs
+        media_header = page.get_by_role("heading", level=2, name=_RX_MEDIA_HEADER)
+        self._page_locs = {
+            "scene_spans": page.locator(_SCENE_SPAN_SEL),
+            "editor": page.locator(_EDITOR_SEL),
+            "canvas_wrapper": page.locator("#editorCanvasWrapper"),
+            "canvas": page.locator("canvas"),
+            "media_header": media_header,
+            "media_panel": page.locator("aside, section, div").filter(has=media_header).first,
+            "close_button": page.locator('button:has(iconpark-icon[name="close"])'),
+            "broll_search": page.get_by_role("textbox", name=_RX_BROLL_SEARCH),
+            "broll_search_fallbacks": [page.locator(sel) for sel in _BROLL_SEARCH_SELECTORS],
+            "broll_result_cards": [
+                page.locator('[role="option"]'),
+                page.locator('[role="listitem"]'),
+                page.locator('[role="button"][aria-label*="video" i]'),
+                page.locator('[role="button"][aria-label*="видео" i]'),
+                page.locator('div.tw-group').filter(has=page.locator('img, video')),
+                page.locator('[role="button"]').filter(has=page.locator('img, video')),
+            ],
+        }
+        self._bound_page = page
+        return self._page_locs
+
+    def _scene_span(self, page: Page, label: str, flags: int = 0) -> Locator:
+        return self._bind_page(page)["scene_spans"].filter(has_text=_label_pattern(label, flags))
+
     async def _locate_broll_search_input(self, page: Page):
+        locs = self._bind_page(page)
         try:
-            inp = page.get_by_role("textbox", name=re.compile(r"(Искать видео онлайн|Search videos online)", re.I))
+            inp = locs["broll_search"]
             if await inp.count() > 0:
                 return inp.first
         except Exception:
             pass
-        selectors = [
-            'input[placeholder*="Искать"][placeholder*="онлайн"]',
-            'input[placeholder="Искать видео онлайн"]',
-            'input[placeholder="Искать Изображение онлайн"]',
-            'input[placeholder*="Search"][placeholder*="online"]',
-            'input[placeholder="Search videos online"]',
-            'input[type="search"]',
-        ]
-        for sel in selectors:
+        for loc in locs["broll_search_fallbacks"]:
             try:
-                loc = page.locator(sel)
                 if await loc.count() > 0:
                     return loc.first
             except Exception:
@@ -621,15 +924,7 @@ class HeyGenAutomation:
         return None
 
     async def _locate_broll_result_card(self, page: Page):
-        candidates = [
-            page.locator('[role="option"]'),
-            page.locator('[role="listitem"]'),
-            page.locator('[role="button"][aria-label*="video" i]'),
-            page.locator('[role="button"][aria-label*="видео" i]'),
-            page.locator('div.tw-group').filter(has=page.locator('img, video')),
-            page.locator('[role="button"]').filter(has=page.locator('img, video')),
-        ]
-        for loc in candidates:
+        for loc in self._bind_page(page)["broll_result_cards"]:
             try:
                 if await loc.count() > 0:
                     return loc.first
@@ -667,11 +962,9 @@ class HeyGenAutomation:
         await self._await_gate()
         try:
             await page.keyboard.press('Meta+A')
-            await asyncio.sleep(0.05)
             await page.keyboard.press('Backspace')
-            await asyncio.sleep(0.05)
             await page.keyboard.insert_text(text)
-            await asyncio.sleep(0.1)
+            await wait_for_focused_text(page, text)
             await page.keyboard.press('Tab')
         except Exception:
             pass
@@ -704,43 +997,111 @@ class HeyGenAutomation:
         try:
             if min_wait_sec and min_wait_sec > 0:
                 await self._broll_pause(float(min_wait_sec))
-            for _ in range(50):
-                busy = page.locator('[aria-busy="true"]')
+            try:
+                await page.wait_for_function(
+                    "() => !document.querySelector('[aria-busy=\"true\"]')",
+                    timeout=30000,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await self._await_gate()
+            return True
+        except Exception:
+            return True
+
+    async def _gate_goto_wait(
+        self,
+        page: Page,
+        url: str,
+        *,
+        wait_until: str = 'domcontentloaded',
+        selector: str | None = None,
+        goto_timeout: int = 120000,
+        sel_timeout: int = 30000,
+    ) -> bool:
+        """
+        Пауза-гейт, переход и ожидание селектора одним примитивом.
+        
+        Навигация ждётся только до commit, после чего ожидание селектора
+        и загрузки документа идут параллельно: селектор срабатывает сразу,
+        как только элемент появился, а не после полного DOM-ready.
+        Селектор не может совпасть со старой страницей — ожидание стартует
+        уже на новом документе.
+        
+        Returns:
+            True если селектор дождались (или он не задан)
+        """
+        await self._await_gate()
+        if not selector:
+            await page.goto(url, wait_until=wait_until, timeout=goto_timeout)
+            return True
+        await page.goto(url, wait_until='commit', timeout=goto_timeout)
+        load = None
+        if wait_until in ('load', 'domcontentloaded', 'networkidle'):
+            load = asyncio.ensure_future(page.wait_for_load_state(wait_until, timeout=goto_timeout))
+        try:
+            await page.wait_for_selector(selector, timeout=sel_timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+        finally:
+            if load is not None:
                 try:
-                    if await busy.count() > 0:
-                        await self._broll_pause(0.2)
-                        continue
+                    await load
+                except asyncio.CancelledError:
+                    raise
                 except Exception:
                     pass
-                return True
+
+    async def _wait_after_click(self, page: Page, expect_selector: str, timeout_ms: int = 5000, state: str = 'visible') -> bool:
+        """Дождаться изменения DOM после клика вместо фиксированной паузы"""
+        try:
+            await page.locator(expect_selector).last.wait_for(state=state, timeout=timeout_ms)
             return True
+        except asyncio.CancelledError:
+            raise
         except Exception:
-            return True
+            return False
+        finally:
+            await self._await_gate()
+
+    async def _canvas_rect(self, page: Page):
+        """Прямоугольник canvas (x, y, w, h), а без него — вьюпорт"""
+        try:
+            box = await self._bind_page(page)["canvas"].first.bounding_box()
+            if box:
+                return (box["x"], box["y"], box["width"], box["height"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        try:
+            vs = page.viewport_size
+        except Exception:
+            vs = None
+        if vs:
+            return (0.0, 0.0, vs["width"], vs["height"])
+        return None
 
     async def _try_delete_foreground(self, page: Page) -> bool:
         clicks = [(0.5, 0.5), (0.5, 0.42), (0.5, 0.62), (0.4, 0.5), (0.6, 0.5)]
         pressed_any = False
+        rect = await self._canvas_rect(page)
         for (rx, ry) in clicks:
             try:
                 try:
                     await page.keyboard.press("Escape")
                 except Exception:
                     pass
-                canvas = page.locator("canvas").first
-                box = await canvas.bounding_box()
-                if box:
-                    await page.mouse.click(box["x"] + box["width"] * rx, box["y"] + box["height"] * ry)
-                else:
-                    vs = page.viewport_size
-                    if vs:
-                        await page.mouse.click(vs["width"] * rx, vs["height"] * ry)
+                if rect:
+                    x, y, w, h = rect
+                    await page.mouse.click(x + w * rx, y + h * ry)
             except Exception:
-                try:
-                    vs = page.viewport_size
-                    if vs:
-                        await page.mouse.click(vs["width"] * rx, vs["height"] * ry)
-                except Exception:
-                    pass
+                pass
 
             await self._broll_pause(0.2)
             for key in ("Backspace", "Delete"):
@@ -761,14 +1122,10 @@ class HeyGenAutomation:
                 await page.keyboard.press("Escape")
             except Exception:
                 pass
-            canvas = page.locator("canvas").first
-            box = await canvas.bounding_box()
-            if box:
-                await page.mouse.click(box["x"] + box["width"] * 0.5, box["y"] + box["height"] * 0.5)
-                return True
-            vs = page.viewport_size
-            if vs:
-                await page.mouse.click(vs["width"] * 0.5, vs["height"] * 0.5)
+            rect = await self._canvas_rect(page)
+            if rect:
+                x, y, w, h = rect
+                await page.mouse.click(x + w * 0.5, y + h * 0.5)
                 return True
         except Exception:
             pass
@@ -777,23 +1134,31 @@ class HeyGenAutomation:
     def load_data(self):
         """Загрузить данные из CSV"""
         print(f"📁 Загружаю данные из {self.csv_path}...")
+        cached_df = self._load_parse_cache()
+        if cached_df is not None:
+            self.df = cached_df
+            print(f"✅ Загружено {len(self.df)} строк (кэш разбора CSV)")
+            self.reset_data_cache()
+            return self.df
         try:
             try:
-                self.df = pd.read_csv(self.csv_path, encoding='utf-8-sig', sep=None, engine='python')
+                self.df = pd.read_csv(
+                    self.csv_path,
+                    encoding='utf-8-sig',
+                    sep=self._sniff_csv_delimiter(),
+                    engine='c',
+                )
             except Exception:
-                self.df = pd.read_csv(self.csv_path, encoding='utf-8', sep=None, engine='python')
+                try:
+                    self.df = pd.read_csv(self.csv_path, encoding='utf-8-sig', sep=None, engine='python')
+                except Exception:
+                    self.df = pd.read_csv(self.csv_path, encoding='utf-8', sep=None, engine='python')
         except Exception as e:
             print(f"❌ Ошибка чтения CSV: {e}")
             raise
         print(f"✅ Загружено {len(self.df)} строк")
         # Нормализация названий колонок (удаление BOM и лишних пробелов)
-        cols_before = list(self.df.columns)
-        norm_map = {}
-        for c in cols_before:
-            c2 = str(c).replace('\ufeff', '').strip()
-            norm_map[c] = c2
-        if norm_map:
-            self.df = self.df.rename(columns=norm_map)
+        self.df.columns = self.df.columns.astype(str).str.replace('\ufeff', '', regex=False).str.strip()
         print(f"Колонки: {list(self.df.columns)}")
         # Поддержка кастомных имен колонок
         colmap = {
@@ -811,27 +1176,111 @@ class HeyGenAutomation:
         synonyms = {
             'brolls': ['broll_query', 'broll', 'broll_query_ru']
         }
+        present = set(self.df.columns)
+        syn_map = {}
         for target, alts in synonyms.items():
-            if target not in self.df.columns:
-                for a in alts:
-                    if a in self.df.columns:
-                        self.df = self.df.rename(columns={a: target})
-                        break
-        missing = [c for c in required if c not in self.df.columns]
+            if target not in present:
+                alt = next((a for a in alts if a in present), None)
+                if alt is not None:
+                    syn_map[alt] = target
+        if syn_map:
+            self.df = self.df.rename(columns=syn_map)
+            present = set(self.df.columns)
+        missing = [c for c in required if c not in present]
         if missing:
             print(f"❌ Отсутствуют обязательные колонки: {missing}")
             print("   Убедись, что разделитель CSV — ';' или ',' и первая строка содержит заголовки.")
             raise KeyError(f"Missing columns: {missing}")
         # Переименовываем в стандартные названия
-        ren = {v: k for k, v in colmap.items() if v in self.df.columns}
+        ren = {v: k for k, v in colmap.items() if v in present and v != k}
         if ren:
             self.df = self.df.rename(columns=ren)
         try:
-            self.df['part_idx'] = pd.to_numeric(self.df['part_idx'], errors='coerce')
-            self.df['scene_idx'] = pd.to_numeric(self.df['scene_idx'], errors='coerce')
+            self.df['part_idx'] = pd.to_numeric(self.df['part_idx'], errors='coerce', downcast='integer')
+            self.df['scene_idx'] = pd.to_numeric(self.df['scene_idx'], errors='coerce', downcast='integer')
         except Exception:
             pass
+        try:
+            if 'brolls' in self.df.columns:
+                self.df['brolls'] = self.df['brolls'].astype('category')
+        except Exception:
+            pass
+        self._store_parse_cache(self.df)
+        self.reset_data_cache()
         return self.df
+
+    def _parse_cache_key(self):
+        try:
+            st = os.stat(self.csv_path)
+        except OSError:
+            return None, None
+        abs_path = os.path.abspath(self.csv_path)
+        name = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()
+        path = os.path.join("debug", "csv_cache", f"{name}.pkl")
+        key = (_CSV_CACHE_SCHEMA, abs_path, st.st_mtime_ns, st.st_size, json.dumps(self.csv_columns, sort_keys=True, default=str))
+        return path, key
+
+    def _load_parse_cache(self):
+        if not bool(self.config.get('csv_parse_cache', True)):
+            return None
+        path, key = self._parse_cache_key()
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+            if payload.get('key') == key:
+                return payload['df']
+        except Exception:
+            pass
+        return None
+
+    def _store_parse_cache(self, df) -> None:
+        if not bool(self.config.get('csv_parse_cache', True)):
+            return
+        path, key = self._parse_cache_key()
+        if not path:
+            return
+        try:
+            # Сериализуем сразу (df может меняться позже), на диск пишем в фоне
+            data = pickle.dumps({'key': key, 'df': df}, protocol=5)
+        except Exception:
+            return
+
+        def _write():
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except Exception:
+                pass
+
+        threading.Thread(target=_write, daemon=True).start()
+
+    def _sniff_csv_delimiter(self) -> str:
+        with open(self.csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            head = f.read(4096)
+        return csv.Sniffer().sniff(head, delimiters=';,\t|').delimiter
+
+    def reset_data_cache(self):
+        """Сбросить индексы по эпизодам (вызывать после изменения self.df на месте)"""
+        self._index_df = None
+        self._rows_by_ep = {}
+        self._rows_by_ep_part = {}
+        self._parts_by_ep = {}
+        self._template_url_by_ep = {}
+        self._episode_data_cache = {}
+
+    def _ensure_episode_index(self):
+        if self._index_df is self.df:
+            return
+        self.reset_data_cache()
+        df = self.df
+        self._rows_by_ep = df.groupby('episode_id', sort=False).indices
+        self._rows_by_ep_part = df.groupby(['episode_id', 'part_idx'], sort=False).indices
+        self._index_df = df
     
     def get_all_episode_parts(self, episode_id: str):
         """
@@ -843,13 +1292,19 @@ class HeyGenAutomation:
         Returns:
             list: Список номеров частей
         """
-        episode_data = self.df[self.df['episode_id'] == episode_id]
-        
-        if episode_data.empty:
-            return []
-        vals = pd.to_numeric(episode_data['part_idx'], errors='coerce').dropna().tolist()
-        parts = sorted({int(v) for v in vals})
-        return parts
+        self._ensure_episode_index()
+        parts = self._parts_by_ep.get(episode_id)
+        if parts is None:
+            found = set()
+            for ep, p in self._rows_by_ep_part:
+                if ep != episode_id:
+                    continue
+                v = pd.to_numeric(p, errors='coerce')
+                if not pd.isna(v):
+                    found.add(int(v))
+            parts = sorted(found)
+            self._parts_by_ep[episode_id] = parts
+        return list(parts)
     
     def get_episode_data(self, episode_id: str, part_idx: int):
         """
@@ -862,59 +1317,81 @@ class HeyGenAutomation:
         Returns:
             tuple: (template_url, list of scenes)
         """
-        # Фильтруем данные по episode_id и part_idx
-        episode_data = self.df[
-            (self.df['episode_id'] == episode_id) & 
-            (self.df['part_idx'] == part_idx)
-        ].copy()
-        
-        if episode_data.empty:
+        self._ensure_episode_index()
+        key = (episode_id, part_idx)
+        cached = self._episode_data_cache.get(key)
+        if cached is None:
+            cached = self._build_episode_data(episode_id, part_idx)
+            self._episode_data_cache[key] = cached
+        template_url, scenes = cached
+        if not scenes:
             print(f"⚠️ Нет данных для {episode_id}, часть {part_idx}")
             return None, []
+
+        print(f"📋 Эпизод: {episode_id}, Часть: {part_idx}")
+        print(f"🔗 URL шаблона: {template_url}")
+        print(f"🎬 Сцен для заполнения: {len(scenes)}")
+
+        # Копии, чтобы вызывающий код не менял закэшированные сцены
+        return template_url, [dict(sc) for sc in scenes]
+
+    def _build_episode_data(self, episode_id: str, part_idx: int):
+        # Берём строки по episode_id и part_idx из предпостроенного индекса
+        rows = self._rows_by_ep_part.get((episode_id, part_idx))
+        if rows is None or len(rows) == 0:
+            return None, ()
+        episode_data = self.df.take(rows)
         
         # Получаем URL шаблона из ЛЮБОЙ строки этого эпизода (они одинаковые для всех частей)
-        episode_rows = self.df[self.df['episode_id'] == episode_id]
-        template_url = None
-        if 'template_url' in episode_rows.columns and len(episode_rows) > 0:
-            template_url = self._as_clean_str(episode_rows.iloc[0]['template_url'])
-            if not template_url:
-                template_url = None
-        
-        episode_data = episode_data.sort_values('scene_idx', key=lambda s: pd.to_numeric(s, errors='coerce'))
+        if episode_id in self._template_url_by_ep:
+            template_url = self._template_url_by_ep[episode_id]
+        else:
+            template_url = None
+            if 'template_url' in self.df.columns:
+                template_url = self._as_clean_str(self.df['template_url'].iat[self._rows_by_ep[episode_id][0]])
+                if not template_url:
+                    template_url = None
+            self._template_url_by_ep[episode_id] = template_url
         
-        # Формируем список сцен
-        scenes = []
-        for _, row in episode_data.iterrows():
-            bval = self._as_clean_str(row.get('brolls', None))
-            bval = '' if bval.lower() == 'nan' else bval
-            sidx_raw = self._coerce_scalar(row.get('scene_idx'))
-            sidx_num = pd.to_numeric(sidx_raw, errors='coerce')
-            sidx = 0
-            try:
-                sidx = 0 if pd.isna(sidx_num) else int(sidx_num)
-            except Exception:
-                sidx = 0
-            text_v = self._coerce_scalar(row.get('text'))
-            if text_v is None:
-                text_s = ''
-            else:
-                try:
-                    text_s = '' if pd.isna(text_v) else str(text_v)
-                except Exception:
-                    text_s = str(text_v)
-            scenes.append({
-                'scene_idx': sidx,
-                'speaker': self._as_clean_str(row.get('speaker')),
-                'text': text_s,
-                'title': self._as_clean_str(row.get('title')) or f"{episode_id}_part_{part_idx}",
-                'brolls': bval
-            })
+        # load_data уже привёл scene_idx к числу — сортируем без key-callback
+        if pd.api.types.is_numeric_dtype(episode_data['scene_idx']):
+            episode_data = episode_data.sort_values('scene_idx', kind='stable')
+        else:
+            episode_data = episode_data.sort_values(
+                'scene_idx', kind='stable', key=lambda s: pd.to_numeric(s, errors='coerce')
+            )
         
-        print(f"📋 Эпизод: {episode_id}, Часть: {part_idx}")
-        print(f"🔗 URL шаблона: {template_url}")
-        print(f"🎬 Сцен для заполнения: {len(scenes)}")
+        # Формируем список сцен по колонкам целиком, без iterrows
+        sidx = pd.to_numeric(self._column(episode_data, 'scene_idx'), errors='coerce').fillna(0).astype('int64').tolist()
+        speakers = self._clean_str_column(episode_data, 'speaker').tolist()
+        texts = self._str_column(episode_data, 'text').tolist()
+        default_title = f"{episode_id}_part_{part_idx}"
+        titles = [t or default_title for t in self._clean_str_column(episode_data, 'title').tolist()]
+        brolls = self._clean_str_column(episode_data, 'brolls')
+        brolls = brolls.mask(brolls.str.lower() == 'nan', '').tolist()
+        scenes = tuple(
+            {'scene_idx': int(i), 'speaker': sp, 'text': tx, 'title': ti, 'brolls': br}
+            for i, sp, tx, ti, br in zip(sidx, speakers, texts, titles, brolls)
+        )
         
         return template_url, scenes
+
+    def _column(self, frame, name: str):
+        if name not in frame.columns:
+            return pd.Series([None] * len(frame), index=frame.index, dtype=object)
+        col = frame[name]
+        if isinstance(col, pd.DataFrame):
+            col = col.iloc[:, 0]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = col.astype(object)
+        return col
+
+    def _str_column(self, frame, name: str):
+        col = self._column(frame, name)
+        return col.where(col.notna(), '').astype(str)
+
+    def _clean_str_column(self, frame, name: str):
+        return self._str_column(frame, name).str.strip()
     
     @step("fill_scene")
     async def fill_scene(self, page: Page, scene_number: int, text: str, speaker: str | None = None):
@@ -933,28 +1410,21 @@ class HeyGenAutomation:
         try:
             await self._await_gate()
             # Ищем span с текстом text_X (строгий матч по всей строке)
-            span_locator = page.locator('span[data-node-view-content-react]').filter(
-                has_text=re.compile(rf'^\s*{re.escape(text_label)}\s*$')
-            )
+            span_locator = self._scene_span(page, text_label)
             
-            # Проверяем существование
-            count = await span_locator.count()
-            if count == 0:
+            # Проверяем существование и сразу центрируем сцену (один evaluate вместо count + scroll)
+            probed_text = await page.evaluate(_JS_PROBE_SCENE_SPAN, text_label)
+            if probed_text is None:
                 await self._scroll_scene_list_until_label(page, text_label)
                 try:
-                    count = await span_locator.count()
+                    probed_text = await page.evaluate(_JS_PROBE_SCENE_SPAN, text_label)
                 except Exception:
-                    count = 0
-                if count == 0:
+                    probed_text = None
+                if probed_text is None:
                     self._emit_notice(f"⚠️ scene_field_missing: scene={scene_number} label={text_label}")
                     self._emit_step({"type": "finish_scene", "scene": scene_number, "ok": False})
                     return False
-
-            await self._ensure_min_unfilled_scenes_visible(
-                page,
-                scene_number,
-                min_visible=self.min_unfilled_scenes_visible,
-            )
+            await asyncio.sleep(0.1)
             
             safe_speaker = self._normalize_speaker_key(speaker)
 
@@ -970,15 +1440,8 @@ class HeyGenAutomation:
                     return False
                 await self._await_gate()
                 await asyncio.sleep(random.uniform(0.1, 0.2))
-                try:
-                    s_over = (self.config.get('step_overrides') or {}).get('fill_scene') or {}
-                    extra_delay = float(s_over.get('delay_sec', 0))
-                    if extra_delay > 0:
-                        await asyncio.sleep(extra_delay)
-                except asyncio.CancelledError:
-                    raise
-                except Exception:
-                    pass
+                if self._extra_fill_delay > 0:
+                    await asyncio.sleep(self._extra_fill_delay)
                 return True
 
             step_name_select = f"select_scene_{scene_number}" if not safe_speaker else f"select_scene_{scene_number}_{safe_speaker}"
@@ -997,12 +1460,11 @@ class HeyGenAutomation:
                     # We expect to see 'text_N'
                     expected_placeholder = f"text_{scene_number}"
                     
-                    # Read current text from the active element (which we just clicked)
-                    current_content = await span_locator.first.inner_text(timeout=1000)
-                    current_content = current_content.strip()
+                    # Text of the span we located and clicked (read by the probe above)
+                    current_content = str(probed_text or "").strip()
                     
                     # Regex to see if it looks like ANY placeholder 'text_M'
-                    m = re.fullmatch(r"text_(\d+)", current_content)
+                    m = _RX_TEXT_LABEL.match(current_content)
                     
                     if m:
                         found_idx = int(m.group(1))
@@ -1023,54 +1485,66 @@ class HeyGenAutomation:
                     pass
                 # -------------------------
 
-                editor = page.locator(
-                    'div[contenteditable="true"][role="textbox"][translate="no"][tabindex="0"]'
-                )
+                editor = self._bind_page(page)["editor"]
+                current_text = None
                 try:
                     await editor.first.wait_for(state="visible", timeout=5000)
-                    await editor.first.focus(timeout=3000)
+                    # Фокус и чтение текущего содержимого за один запрос
+                    current_text = await editor.first.evaluate(
+                        "(el) => { el.focus(); return el.innerText || ''; }", timeout=3000
+                    )
                 except Exception:
                     pass
 
-                await page.keyboard.press('Meta+A')
-                await asyncio.sleep(0.05)
-                await page.keyboard.press('Backspace')
-                await asyncio.sleep(random.uniform(0.05, 0.1))
+                current_norm = None if current_text is None else self.normalize_text_for_compare(current_text)
+                if current_norm is not None and current_norm == self.normalize_text_for_compare(text):
+                    self._emit_notice(f"ℹ️ scene_already_filled: scene={scene_number}")
+                else:
+                    if current_norm != "":
+                        await page.keyboard.press('Meta+A')
+                        await page.keyboard.press('Backspace')
 
-                await self._await_gate()
-                await page.keyboard.insert_text(text)
-                await asyncio.sleep(random.uniform(0.1, 0.2))
+                    await self._await_gate()
+                    await page.keyboard.insert_text(text)
+                    # Ждём, пока редактор примет текст, вместо фиксированной паузы перед blur
+                    await wait_for_focused_text(page, text)
                 try:
                     await editor.first.evaluate("(el) => el && el.blur && el.blur()")
                 except Exception:
                     pass
                 try:
-                    canvas = page.locator("#editorCanvasWrapper")
+                    canvas = self._bind_page(page)["canvas_wrapper"]
                     if await canvas.count() > 0:
                         await human_coordinate_click(page, canvas.first)
                 except Exception:
                     pass
                 await asyncio.sleep(random.uniform(0.15, 0.3))
+                enhance_state = {}
+                if self._enable_enhance_voice:
+                    try:
+                        enhance_state = await page.evaluate(_JS_ENHANCE_VOICE_STATE) or {}
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception:
+                        enhance_state = {}
                 try:
-                    if bool(self.config.get('enable_enhance_voice', False)):
-                        btn = page.locator('button#voice-enhancement-jeFjSzUn:has-text("Enhance Voice")')
-                        if await btn.count() == 0:
-                            btn = page.locator('button:has(iconpark-icon[name="director-mode"])').filter(has_text=re.compile(r'^\s*Enhance Voice\s*$'))
-                        if await btn.count() > 0:
-                            await btn.first.click(timeout=3000)
-                            await asyncio.sleep(0.1)
+                    if enhance_state.get('byId') or enhance_state.get('exact'):
+                        if enhance_state.get('byId'):
+                            btn = page.locator('button#voice-enhancement-jeFjSzUn:has-text("Enhance Voice")')
+                        else:
+                            btn = page.locator('button:has(iconpark-icon[name="director-mode"])').filter(has_text=_RX_ENHANCE_VOICE_EXACT)
+                        await btn.first.click(timeout=3000)
+                        await asyncio.sleep(0.1)
                 except asyncio.CancelledError:
                     raise
                 except Exception:
                     pass
 
-                if self.config.get('enable_enhance_voice'):
+                if enhance_state.get('any'):
                     try:
-                        enhance_buttons = page.locator('button:has(iconpark-icon[name="director-mode"])').filter(has_text=re.compile(r'Enhance Voice|Усилить голос'))
-                        button_count = await enhance_buttons.count()
-                        if button_count > 0:
-                            await enhance_buttons.last.click()
-                            await asyncio.sleep(0.3)
+                        enhance_buttons = page.locator('button:has(iconpark-icon[name="director-mode"])').filter(has_text=_RX_ENHANCE_VOICE)
+                        await enhance_buttons.last.click(timeout=3000)
+                        await asyncio.sleep(0.3)
                     except asyncio.CancelledError:
                         raise
                     except Exception:
@@ -1087,22 +1561,26 @@ class HeyGenAutomation:
                 return False
             if self.verify_scene_after_insert:
                 async def _verify_scene():
-                    editor = page.locator(
-                        'div[contenteditable="true"][role="textbox"][translate="no"][tabindex="0"]'
-                    )
+                    editor = self._bind_page(page)["editor"]
                     expected_norm = self.normalize_text_for_compare(text)
                     if not expected_norm:
                         return True
+                    verify_args = {
+                        "sel": _EDITOR_SEL,
+                        "expected": expected_norm,
+                        "strip": self._enable_enhance_voice,
+                    }
 
                     for attempt in range(3):
                         await self._await_gate()
                         await asyncio.sleep(0.25)
                         try:
-                            cur = await editor.first.inner_text(timeout=2000)
+                            status = await page.evaluate(_JS_VERIFY_EDITOR_TEXT, verify_args)
+                        except asyncio.CancelledError:
+                            raise
                         except Exception:
-                            cur = ""
-                        cur_norm = self.normalize_text_for_compare(cur)
-                        if expected_norm in cur_norm:
+                            status = "missing"
+                        if status == "ok":
                             return True
 
                         try:
@@ -1125,20 +1603,18 @@ class HeyGenAutomation:
                             pass
                         try:
                             await page.keyboard.press("Meta+A")
-                            await asyncio.sleep(0.05)
                             await page.keyboard.press("Backspace")
-                            await asyncio.sleep(0.05)
                             if attempt >= 1:
                                 await page.keyboard.type(str(text or ""), delay=15)
                             else:
                                 await page.keyboard.insert_text(str(text or ""))
-                            await asyncio.sleep(0.15)
+                            await wait_for_focused_text(page, str(text or ""))
                             try:
                                 await editor.first.evaluate("(el) => el && el.blur && el.blur()")
                             except Exception:
                                 pass
                             try:
-                                canvas = page.locator("#editorCanvasWrapper")
+                                canvas = self._bind_page(page)["canvas_wrapper"]
                                 if await canvas.count() > 0:
                                     await human_coordinate_click(page, canvas.first)
                             except Exception:
@@ -1172,6 +1648,39 @@ class HeyGenAutomation:
                 raise
             return False
 
+    async def fill_scenes_batch(self, page: Page, scenes: list, pause_sec: float = 0.0) -> int:
+        """
+        Заполнить несколько сцен подряд
+
+        Ввод строго последовательный: сцены конкурируют за фокус редактора.
+        Ошибка одной сцены не прерывает заполнение остальных.
+
+        Args:
+            page: Playwright страница
+            scenes: Сцены (dict с scene_idx, text, speaker)
+            pause_sec: Пауза после каждой сцены
+
+        Returns:
+            int: Количество успешно заполненных сцен
+        """
+        items = [(int(sc['scene_idx']), str(sc.get('text') or ''), sc.get('speaker')) for sc in scenes or []]
+        if not items:
+            return 0
+        done = 0
+        for idx, text, speaker in items:
+            await self._await_gate()
+            try:
+                if await self.fill_scene(page, idx, text, speaker):
+                    done += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            if pause_sec > 0:
+                await self._await_gate()
+                await asyncio.sleep(pause_sec)
+        return done
+
     # Поиск по бейджу сцены отключен по запросу
     
     async def delete_empty_scenes(self, page: Page, filled_scenes_count: int, max_scenes: int = 15):
@@ -1195,64 +1704,67 @@ class HeyGenAutomation:
         await self._await_gate()
         
         try:
-            strategy = str(self.config.get('generate_button_selector_strategy', 'text')).lower()
-            names_raw = str(self.config.get('generate_button_name', 'Сгенерировать|Generate'))
-            names = [n.strip() for n in names_raw.split('|') if n.strip()]
-            custom_sel = str(self.config.get('generate_button_selector_custom', '') or '')
-            icon_name = str(self.config.get('generate_button_icon_name', '') or '')
+            gen_cfg = self._gen_cfg
+            strategy = gen_cfg['strategy']
+            names_raw = gen_cfg['names_raw']
+            custom_sel = gen_cfg['custom_sel']
+            icon_name = gen_cfg['icon_name']
+            try:
+                host = urlparse(page.url).netloc
+            except Exception:
+                host = ''
+            cache_key = (host, strategy, names_raw, custom_sel, icon_name)
             button = None
-            if strategy == 'role':
-                for n in names:
-                    try:
-                        btn_candidate = page.get_by_role('button', name=n)
-                        if await btn_candidate.count() > 0:
-                            button = btn_candidate
-                            break
-                    except Exception:
-                        continue
-            elif strategy == 'icon' and icon_name:
-                try:
-                    ico = page.locator(f'iconpark-icon[name="{icon_name}"]')
-                    if await ico.count() > 0:
-                        button = ico.first.locator('xpath=ancestor::button[1]')
-                except Exception:
-                    button = None
-            elif strategy == 'custom' and custom_sel:
-                try:
-                    button = page.locator(custom_sel)
-                except Exception:
+            cached = self._cached_generate_selector.get(cache_key)
+            if cached is not None:
+                button = self._generate_button_locator(page, cached)
+                if not await self._exists(page, button):
                     button = None
-            # Fallbacks: text search then generic button text
+                if button is None:
+                    self._cached_generate_selector.pop(cache_key, None)
             if button is None:
-                # Ищем кнопку по тексту
-                pattern = '|'.join([re.escape(n) for n in names]) if names else r'Сгенерировать|Generate'
-                button = page.locator('button').filter(has_text=re.compile(pattern))
+                resolved = None
+                if strategy == 'role':
+                    names = gen_cfg['names']
+                    # Один CSS-запрос на все имена дешевле, чем get_by_role по каждому имени
+                    if names:
+                        css = ', '.join(f'button:has-text({json.dumps(n, ensure_ascii=False)})' for n in names)
+                        if await self._exists(page, page.locator(css)):
+                            resolved = ('css', css)
+                    if resolved is None and names:
+                        # ARIA-роль — одним запросом с regex-именем вместо цикла по именам
+                        try:
+                            if await self._exists(page, self._generate_button_locator(page, ('role', gen_cfg['name_re']))):
+                                resolved = ('role', gen_cfg['name_re'])
+                        except asyncio.CancelledError:
+                            raise
+                        except Exception:
+                            resolved = None
+                elif strategy == 'icon' and icon_name:
+                    if await self._exists(page, f'iconpark-icon[name="{icon_name}"]'):
+                        resolved = ('icon', icon_name)
+                elif strategy == 'custom' and custom_sel:
+                    resolved = ('custom', custom_sel)
+                # Fallbacks: text search then generic button text
+                if resolved is None:
+                    resolved = ('text', gen_cfg['name_re'])
+                button = self._generate_button_locator(page, resolved)
+                self._cached_generate_selector[cache_key] = resolved
             
             # Проверяем существование
-            count = await button.count()
-            if count == 0:
+            if not await self._exists(page, button):
                 print("❌ Кнопка 'Сгенерировать' не найдена")
                 return False
             
-            # Скроллим к кнопке
-            await self._await_gate()
-            await button.scroll_into_view_if_needed()
-            await asyncio.sleep(random.uniform(0.3, 0.5))
-            
-            # Кликаем
+            # Кликаем: click() сам доскролливает и ждёт кликабельности
             await self._await_gate()
             await button.click()
-            try:
-                s_over = (self.config.get('step_overrides') or {}).get('click_generate_button') or {}
-                extra_delay = float(s_over.get('delay_sec', 0))
-                if extra_delay > 0:
-                    await self._await_gate()
-                    await asyncio.sleep(extra_delay)
-            except Exception:
-                pass
+            if self._extra_generate_delay > 0:
+                await self._await_gate()
+                await asyncio.sleep(self._extra_generate_delay)
             print("✅ Кнопка 'Сгенерировать' нажата")
-            await self._await_gate()
-            await asyncio.sleep(random.uniform(1.0, 2.0))
+            # Не дольше прежней фиксированной паузы: fill_and_submit_final_window сам ждёт попап
+            await self._wait_after_click(page, _GENERATE_POPUP_SEL, timeout_ms=2000)
             
             return True
             
@@ -1260,6 +1772,24 @@ class HeyGenAutomation:
             print(f"❌ Ошибка при нажатии кнопки: {e}")
             return False
     
+    async def _exists(self, page: Page, target) -> bool:
+        """Есть ли элемент: CSS-строка — одним evaluate, цепочка локатора — через count()"""
+        if isinstance(target, str):
+            return await selector_exists(page, target)
+        return await locator_exists(target)
+
+    def _generate_button_locator(self, page: Page, resolved: tuple) -> Locator:
+        """Построить локатор кнопки 'Сгенерировать' по разрешённой стратегии"""
+        kind, value = resolved
+        if kind == 'role':
+            return page.get_by_role('button', name=value)
+        if kind == 'icon':
+            return page.locator(f'iconpark-icon[name="{value}"]').first.locator('xpath=ancestor::button[1]')
+        if kind in ('custom', 'css'):
+            return page.locator(value)
+        # Ищем кнопку по тексту (CSS + фильтр, без обхода дерева доступности)
+        return page.locator('button').filter(has_text=value)
+
     async def fill_and_submit_final_window(self, page: Page, title: str):
         """
         Заполнить название видео и нажать "Отправить" в финальном окне
@@ -1274,71 +1804,59 @@ class HeyGenAutomation:
         try:
             # Ждем появления попап окна с заголовком "Сгенерировать видео"
             print("  ⏳ Жду появления окна генерации...")
-            await page.wait_for_selector('div:has-text("Сгенерировать видео")', timeout=10000)
-            await self._await_gate()
-            await asyncio.sleep(random.uniform(0.5, 1.0))
+            await page.wait_for_selector(_GENERATE_POPUP_SEL, timeout=10000)
             
-            # Находим поле ввода по placeholder
-            input_field = page.locator('input[placeholder="Без названия — видео"]')
-            
-            # Проверяем существование
-            count = await input_field.count()
-            if count == 0:
+            # Находим поле ввода по placeholder и ждем его появления в попапе
+            input_field = page.locator(_FINAL_TITLE_INPUT_SEL)
+            if not await self._wait_after_click(page, _FINAL_TITLE_INPUT_SEL, timeout_ms=5000):
                 print("  ❌ Поле ввода названия не найдено")
                 return False
             
             # В попапе может быть несколько таких полей, берем последний (в попапе)
             print(f"  ✏️  Ввожу название: {title}")
             
-            # Кликаем на поле
             await self._await_gate()
-            await input_field.last.click()
-            await asyncio.sleep(random.uniform(0.2, 0.3))
-            
-            # Очищаем поле
-            await self._await_gate()
-            await page.keyboard.press('Meta+A')
-            await asyncio.sleep(0.1)
-            await page.keyboard.press('Backspace')
-            await asyncio.sleep(random.uniform(0.1, 0.2))
-            
-            # Вводим название
-            await self._await_gate()
-            await page.keyboard.insert_text(title)
-            await asyncio.sleep(random.uniform(0.3, 0.5))
+            # fill() очищает и вставляет значение за один вызов
+            await input_field.last.fill(title)
             
             print("  ✅ Название введено")
             
             # Находим кнопку "Отправить" в попапе
-            submit_button = page.locator('button').filter(has_text=re.compile(r'Отправить|Submit', re.I))
+            submit_button = page.locator('button').filter(has_text=_RX_SUBMIT)
             
             # Проверяем существование
-            button_count = await submit_button.count()
-            if button_count == 0:
+            if not await self._exists(page, submit_button):
                 print("  ❌ Кнопка 'Отправить' не найдена")
                 return False
             
             print("  🚀 Нажимаю кнопку 'Отправить'...")
             
-            # Кликаем на кнопку
+            # Кликаем на кнопку; ожидание редиректа на projects подписано до клика,
+            # поэтому событие навигации приходит напрямую, без опроса URL
             await self._await_gate()
-            await submit_button.last.click()
-            
-            print("  ✅ Видео отправлено на генерацию!")
-            print("  ⏳ Жду редиректа на страницу проектов...")
-            
-            # Ждем редиректа на страницу projects
+            clicked = False
             try:
-                await page.wait_for_url("**/projects**", timeout=self.generation_redirect_timeout_ms)
+                async with page.expect_navigation(
+                    url=_RX_PROJECTS_URL,
+                    wait_until='domcontentloaded',
+                    timeout=self.generation_redirect_timeout_ms,
+                ):
+                    await submit_button.last.click()
+                    clicked = True
+                    print("  ✅ Видео отправлено на генерацию!")
+                    print("  ⏳ Жду редиректа на страницу проектов...")
                 print("  ✅ Редирект выполнен, видео в процессе генерации!")
-                await self._await_gate()
-                await asyncio.sleep(2)
             except asyncio.CancelledError:
                 raise
             except Exception as e:
-                print(f"  ⚠️ Таймаут ожидания редиректа, но продолжаю: {e}")
-                await self._await_gate()
-                await asyncio.sleep(3)
+                if not clicked:
+                    raise
+                if _RX_PROJECTS_URL.search(page.url or ""):
+                    print("  ✅ Редирект выполнен, видео в процессе генерации!")
+                else:
+                    print(f"  ⚠️ Таймаут ожидания редиректа, но продолжаю: {e}")
+                    await self._await_gate()
+                    await asyncio.sleep(3)
             
             return True
             
@@ -1348,6 +1866,34 @@ class HeyGenAutomation:
             print(f"  ❌ Ошибка при заполнении финального окна: {e}")
             return False
     
+    async def _ensure_browser(self) -> bool:
+        """
+        Лениво открыть браузер один раз и переиспользовать подключение.
+        
+        Параллельные вызовы ждут друг друга на замке, поэтому CDP-подключение
+        и возможный запуск Chrome выполняются не более одного раза.
+        """
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+        async with self._browser_lock:
+            return await self.open_browser()
+
+    async def aclose(self):
+        """Остановить Playwright при выходе; чужой (CDP) браузер не закрывается"""
+        if self._owns_browser_process:
+            await self.close_browser()
+            return
+        p = self.playwright
+        self._page = None
+        self.playwright_context = None
+        self.browser = None
+        self.playwright = None
+        if p is not None:
+            try:
+                await p.stop()
+            except Exception:
+                pass
+
     @step("open_browser")
     async def open_browser(self) -> bool:
         """
@@ -1389,13 +1935,15 @@ class HeyGenAutomation:
             self.playwright = p
             
             print("\n🌐 Подключаюсь к браузеру через CDP...")
-            browser_mode = (self.config.get('browser') or 'chrome').lower()
-            chrome_cdp_url = self.config.get('chrome_cdp_url') or 'http://localhost:9222'
-            multilogin_cdp_url = self.config.get('multilogin_cdp_url')
-            profiles = self.config.get('profiles') or {}
-            profile_to_use = (self.config.get('profile_to_use') or '').strip()
-            force_embedded = bool(self.config.get('force_embedded_browser', False))
-            self._debug_keep_open = bool(self.config.get('debug_keep_browser_open_on_error', False))
+            # Конфиг мог поменяться из UI (профиль) — перечитываем перед подключением
+            self._hydrate_config()
+            browser_mode = self._cfg_browser
+            chrome_cdp_url = self._cfg_chrome_cdp
+            multilogin_cdp_url = self._cfg_multilogin_cdp
+            profiles = self._cfg_profiles
+            profile_to_use = self._cfg_profile_to_use
+            force_embedded = self._cfg_force_embedded
+            self._debug_keep_open = self._cfg_debug_keep_open
 
             if profile_to_use.lower() == 'ask' or not profile_to_use:
                 if 'chrome_automation' in profiles:
@@ -1415,7 +1963,7 @@ class HeyGenAutomation:
                 print("✅ Подключился к Multilogin по CDP!")
             elif not force_embedded:
                 chosen_cdp = chrome_cdp_url
-                profile_path = str(self.config.get('chrome_profile_path', '~/chrome_automation'))
+                profile_path = self._cfg_chrome_profile_path
 
                 if profiles and profile_to_use and profile_to_use in profiles:
                     pconf = profiles[profile_to_use] or {}
@@ -1450,15 +1998,8 @@ class HeyGenAutomation:
                 pconf = profiles.get(profile_to_use, {})
                 browser_type = pconf.get('browser_type', 'chrome') # default to chrome if not specified
 
-                # Parse port from chosen_cdp (e.g., http://localhost:9222 -> 9222)
-                cdp_port = 9222
-                try:
-                    from urllib.parse import urlparse
-                    parsed = urlparse(chosen_cdp)
-                    if parsed.port:
-                        cdp_port = parsed.port
-                except Exception:
-                    pass
+                # Порт разобран при инициализации (http://localhost:9222 -> 9222)
+                cdp_port = self._cdp_ports.get(chosen_cdp) or _extract_port(chosen_cdp)
 
                 # Try to connect first if browser might be running
                 try:
@@ -1620,7 +2161,7 @@ class HeyGenAutomation:
                 page = context.pages[0]
 
             try:
-                page.set_default_timeout(float(self.config.get('playwright_timeout_ms', 5000)))
+                page.set_default_timeout(self._cfg_playwright_timeout_ms)
             except Exception:
                 pass
             
@@ -1630,22 +2171,25 @@ class HeyGenAutomation:
             logger.error(f"[open_browser] failed: {e}")
             return False
 
-    async def process_episode_part(self, episode_id: str, part_idx: int):
+    async def process_episode_part(self, episode_id: str, part_idx: int, page: Page | None = None):
         """
         Обработать одну часть эпизода
         
         Args:
             episode_id: ID эпизода
             part_idx: Номер части
+            page: Опциональная вкладка уже подключенного браузера (без повторной инициализации сессии)
         """
         self._current_episode_id = episode_id
         self._current_part_idx = int(part_idx)
+        self._refresh_scene_flags()
+        self._hydrate_config()
         # Получаем данные
         template_url, scenes = self.get_episode_data(episode_id, part_idx)
         
         if template_url is None or (isinstance(template_url, str) and template_url.strip() == "") or not scenes:
             try:
-                self.task_status = TaskStatus(task_id=f"{episode_id}:{part_idx}")
+                self._set_task_status(TaskStatus(task_id=f"{episode_id}:{part_idx}"))
                 self.task_status.global_status = "failed"
             except Exception:
                 pass
@@ -1666,18 +2210,23 @@ class HeyGenAutomation:
         except Exception:
             total_scenes = 0
             total_brolls = 0
-        self.task_status = TaskStatus(
+        self._set_task_status(TaskStatus(
             task_id=f"{episode_id}:{part_idx}",
             metrics=Metrics(scenes_total=total_scenes, brolls_total=total_brolls),
-        )
+        ))
         if self.task_status:
             self.task_status.global_status = "running"
 
         p = None
-        page = None
         try:
             async def _init_session():
                 nonlocal p, page
+                if page is not None and not page.is_closed():
+                    return True
+                if self.playwright is None:
+                    # Подключение к браузеру — один раз на весь процесс
+                    if not await self._ensure_browser():
+                        raise RuntimeError("browser_open_failed")
                 if self.playwright is not None:
                     p = self.playwright
                     try:
@@ -1696,7 +2245,7 @@ class HeyGenAutomation:
                         else:
                             page = ctx.pages[0]
                         try:
-                            page.set_default_timeout(float(self.config.get('playwright_timeout_ms', 5000)))
+                            page.set_default_timeout(self._cfg_playwright_timeout_ms)
                         except Exception:
                             pass
                         self.playwright_context = ctx
@@ -1734,155 +2283,38 @@ class HeyGenAutomation:
                         else:
                             page = ctx.pages[0]
                         try:
-                            page.set_default_timeout(float(self.config.get('playwright_timeout_ms', 5000)))
+                            page.set_default_timeout(self._cfg_playwright_timeout_ms)
                         except Exception:
                             pass
                         self.playwright_context = ctx
                         self._page = page
                         return True
                 
-                p = await async_playwright().start()
-                print("\n🌐 Подключаюсь к браузеру через CDP...")
-                browser_mode = (self.config.get('browser') or 'chrome').lower()
-                chrome_cdp_url = self.config.get('chrome_cdp_url') or 'http://localhost:9222'
-                multilogin_cdp_url = self.config.get('multilogin_cdp_url')
-                profiles = self.config.get('profiles') or {}
-                profile_to_use = (self.config.get('profile_to_use') or '').strip()
-                force_embedded = bool(self.config.get('force_embedded_browser', False))
-                self._debug_keep_open = bool(self.config.get('debug_keep_browser_open_on_error', False))
-
-                if profile_to_use.lower() == 'ask' or not profile_to_use:
-                    if 'chrome_automation' in profiles:
-                        profile_to_use = 'chrome_automation'
-                    elif profiles:
-                        profile_to_use = list(profiles.keys())[0]
-                    else:
-                        profile_to_use = 'chrome_automation'
-                    print(f"⚠️ Профиль был 'ask' или пуст, переключился на: {profile_to_use}")
-
-                if not force_embedded and browser_mode == 'multilogin':
-                    if not multilogin_cdp_url:
-                        print("❌ Не задан 'multilogin_cdp_url' в config.json")
-                        raise RuntimeError("multilogin_cdp_url missing")
-                    browser = await p.chromium.connect_over_cdp(multilogin_cdp_url)
-                    print("✅ Подключился к Multilogin по CDP!")
-                elif not force_embedded:
-                    chosen_cdp = chrome_cdp_url
-                    profile_path = str(self.config.get('chrome_profile_path', '~/chrome_automation'))
-
-                    if profiles and profile_to_use and profile_to_use in profiles:
-                        pconf = profiles[profile_to_use] or {}
-                        if pconf.get('cdp_url'):
-                            chosen_cdp = pconf['cdp_url']
-                        if pconf.get('profile_path'):
-                            profile_path = pconf['profile_path']
-                        print(f"✅ Выбран профиль Chrome: {profile_to_use} ({chosen_cdp})")
-
-                    abs_profile_path = os.path.expanduser(profile_path)
-                    os.makedirs(abs_profile_path, exist_ok=True)
-
-                    try:
-                        print(f"🔄 Попытка подключения к {chosen_cdp}...")
-                        browser = await p.chromium.connect_over_cdp(chosen_cdp)
-                        print("✅ Подключился к Chrome через CDP!")
-                    except Exception:
-                        print(f"⚠️ Не удалось подключиться к {chosen_cdp}.")
-                        print("🚀 Запускаю встроенный Chromium с сохраненным состоянием...")
-
-                        auth_state_path = "debug/auth_state.json"
-                        launch_args = [
-                            "--disable-blink-features=AutomationControlled",
-                            "--no-sandbox",
-                            "--ignore-certificate-errors",
-                            "--ignore-ssl-errors",
-                            "--allow-insecure-localhost",
-                            "--disable-web-security"
-                        ]
-
-                        browser = await p.chromium.launch(
-                            headless=False,
-                            args=launch_args
-                        )
-                        print("✅ Запущен встроенный Chromium!")
-                else:
-                    auth_state_path = "debug/auth_state.json"
-                    launch_args = [
-                        "--disable-blink-features=AutomationControlled",
-                        "--no-sandbox",
-                        "--ignore-certificate-errors",
-                        "--ignore-ssl-errors",
-                        "--allow-insecure-localhost",
-                        "--disable-web-security"
-                    ]
-                    browser = await p.chromium.launch(
-                        headless=False,
-                        args=launch_args
-                    )
-                    print("✅ Запущен встроенный Chromium (force_embedded_browser)!")
-
-                contexts = browser.contexts
-                if not contexts:
-                    auth_state_path = "debug/auth_state.json"
-                    context_options = {
-                        "viewport": {"width": 1280, "height": 800},
-                        "ignore_https_errors": True
-                    }
-
-                    if os.path.exists(auth_state_path):
-                        print(f"📂 Загружаю состояние авторизации из {auth_state_path}")
-                        context_options["storage_state"] = auth_state_path
-                    else:
-                        print("⚠️ Файл авторизации не найден, запускаю чистую сессию")
-
-                    context = await browser.new_context(**context_options)
-
-                    await context.add_init_script("""
-                        Object.defineProperty(navigator, 'webdriver', {
-                            get: () => undefined
-                        });
-                    """)
-                else:
-                    context = contexts[0]
-
-                if not context.pages:
-                    page = await context.new_page()
-                else:
-                    page = context.pages[0]
-
-                try:
-                    page.set_default_timeout(float(self.config.get('playwright_timeout_ms', 5000)))
-                except Exception:
-                    pass
-                self._page = page
-                return True
+                raise RuntimeError("browser_context_missing")
 
             await self.perform_step("authorize_session", _init_session, critical=True)
 
-            wf_steps = self.config.get("workflow_steps") or []
+            wf_steps = self._cfg_workflow_steps
             if isinstance(wf_steps, list) and len(wf_steps) > 0:
                 ok = await self._run_workflow(page, template_url, scenes, episode_id, part_idx, wf_steps)
                 return bool(ok)
             
             # Переходим на страницу шаблона
             print(f"📄 Открываю шаблон: {template_url}")
+            # Навигация и ожидание первого поля text_1 идут одним шагом
+            spans_ready = False
             async def _open_template():
-                await page.goto(template_url, wait_until='domcontentloaded', timeout=120000)
+                nonlocal spans_ready
+                spans_ready = await self._gate_goto_wait(page, template_url, selector=_SCENE_SPAN_SEL)
                 return True
-            await self.perform_step("open_template", _open_template, critical=True)
-            
-            # Ждем загрузки страницы и появления первого поля text_1
             print("⏳ Жду загрузки страницы и элементов...")
-            try:
-                # Ждем появления первого текстового поля (до 30 секунд)
-                await page.wait_for_selector('span[data-node-view-content-react]', timeout=30000)
+            await self.perform_step("open_template", _open_template, critical=True)
+            if spans_ready:
                 print("✅ Элементы загрузились!")
-            except asyncio.CancelledError:
-                raise
-            except Exception as e:
-                print(f"⚠️ Timeout при ожидании элементов, но продолжаю: {e}")
-            
-            # Дополнительная пауза для стабильности
-            await asyncio.sleep(self.pre_fill_wait)
+            else:
+                print("⚠️ Timeout при ожидании элементов, но продолжаю")
+                # Дополнительная пауза для стабильности — только если селектор не дождались
+                await asyncio.sleep(self.pre_fill_wait)
 
             part_title = ""
             try:
@@ -1894,20 +2326,19 @@ class HeyGenAutomation:
             await self.perform_step("set_part_title", _set_title, critical=False)
             
             # Заполняем сцены
-            self.report = {
-                'validation_missing': [],
-                'broll_skipped': [],
-                'broll_no_results': [],
-                'broll_errors': [],
-                'manual_intervention': []
-            }
+            self.report = self._new_report()
+            broll_err_append = self.report['broll_errors'].append
             print(f"\n📝 Начинаю заполнение {len(scenes)} сцен...")
             success_count = 0
+            scene_started = None
             
-            for idx, scene in enumerate(scenes, 1):
+            for scene in scenes:
                 await self._await_gate()
+                scene_started = await self._pace_scene(scene_started)
                 async def _fill_one():
-                    return await self.fill_scene(page, scene['scene_idx'], scene['text'], scene.get('speaker'))
+                    async with self._scene_gate():
+                        with self._scene_log():
+                            return await self.fill_scene(page, scene['scene_idx'], scene['text'], scene.get('speaker'))
                 safe_sp = self._normalize_speaker_key(scene.get('speaker'))
                 step_name = f"fill_scene_{scene['scene_idx']}" if not safe_sp else f"fill_scene_{scene['scene_idx']}_{safe_sp}"
                 success = await self.perform_step(step_name, _fill_one, critical=True)
@@ -1919,11 +2350,12 @@ class HeyGenAutomation:
                     except Exception:
                         pass
                     # Обработка B-rolls, если заданы в CSV
-                    if str(scene.get('brolls', '')).strip():
+                    brolls = str(scene.get('brolls', '')).strip()
+                    if brolls:
                         try:
                             await self._await_gate()
                             async def _broll_one():
-                                return await self.handle_broll_for_scene(page, scene['scene_idx'], str(scene['brolls']).strip())
+                                return await self.handle_broll_for_scene(page, scene['scene_idx'], brolls)
                             ok_b = await self.perform_step(f"handle_broll_{scene['scene_idx']}", _broll_one, critical=False)
                             if ok_b:
                                 try:
@@ -1935,12 +2367,7 @@ class HeyGenAutomation:
                             raise
                         except Exception as e:
                             print(f"⚠️ Ошибка обработки brolls для сцены {scene['scene_idx']}: {e}")
-                            if self.report is not None:
-                                self.report['broll_errors'].append({'scene_idx': scene['scene_idx'], 'error': str(e)})
-                # Пауза между сценами
-                if idx < len(scenes):
-                    await self._await_gate()
-                    await asyncio.sleep(self.delay_between_scenes)
+                            broll_err_append({'scene_idx': scene['scene_idx'], 'error': str(e)})
             
             print(f"\n📊 Заполнено сцен: {success_count}/{len(scenes)}")
 
@@ -1948,7 +2375,7 @@ class HeyGenAutomation:
             for attempt in range(1, 4):
                 try:
                     if self.report is not None:
-                        self.report['validation_missing'] = []
+                        self.report['validation_missing'].clear()
                 except Exception:
                     pass
                 final_validation = await self.refresh_and_validate(page, scenes, interactive=False)
@@ -1972,8 +2399,8 @@ class HeyGenAutomation:
                 if self.task_status:
                     self.task_status.global_status = "failed"
                 return False
-            if self._should_block_generation():
-                reason = self._block_generation_reason()
+            blocked, reason = self._generation_gate()
+            if blocked:
                 await self.notify('HeyGen', f'Генерация заблокирована: {reason}')
                 print("============================================================")
                 print("Генерация заблокирована из-за пропусков/ошибок")
@@ -2062,299 +2489,321 @@ class HeyGenAutomation:
         if "{{" not in s:
             return s
         try:
-            def _repl(m):
-                k = str(m.group(1) or "").strip()
-                if k in ctx:
-                    return str(ctx.get(k) or "")
-                return m.group(0)
-            return re.sub(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}", _repl, s)
+            return _wf_template(s)(ctx)
         except Exception:
             return s
 
-    @step("execute_workflow_step")
-    async def _execute_single_step(self, page: Page, raw: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
-        step_type = str(raw.get("type") or "").strip()
-        params = raw.get("params") if isinstance(raw.get("params"), dict) else {}
-        try:
-            if step_type in ("navigate_to_template", "navigate"):
-                url = self._wf_render(params.get("url") or template_url, ctx).strip()
-                wait_until = self._wf_render(params.get("wait_until") or "domcontentloaded", ctx).strip() or "domcontentloaded"
-                timeout = self._wf_int(params.get("timeout_ms"), 120000)
-                print(f"📄 Открываю: {url}")
-                await page.goto(url, wait_until=wait_until, timeout=timeout)
-                return True
-
-            if step_type in ("wait_for", "wait_for_selector"):
-                sel = self._wf_render(params.get("selector") or "", ctx).strip()
-                if not sel:
-                    return True
-                timeout = self._wf_int(params.get("timeout_ms"), 30000)
-                state = self._wf_render(params.get("state") or "visible", ctx).strip() or "visible"
-                await page.wait_for_selector(sel, timeout=timeout, state=state)
-                return True
+    async def _wf_step_navigate(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        url = self._wf_render(params.get("url") or template_url, ctx).strip()
+        wait_until = self._wf_render(params.get("wait_until") or "domcontentloaded", ctx).strip() or "domcontentloaded"
+        timeout = self._wf_int(params.get("timeout_ms"), 120000)
+        self._log(f"📄 Открываю: {url}")
+        await page.goto(url, wait_until=wait_until, timeout=timeout)
+        return True
 
-            if step_type in ("wait", "sleep"):
-                sec = self._wf_float(params.get("sec"), self.pre_fill_wait)
-                await asyncio.sleep(sec)
-                return True
+    async def _wf_step_wait_for(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        sel = self._wf_render(params.get("selector") or "", ctx).strip()
+        if not sel:
+            return True
+        timeout = self._wf_int(params.get("timeout_ms"), 30000)
+        state = self._wf_render(params.get("state") or "visible", ctx).strip() or "visible"
+        await page.wait_for_selector(sel, timeout=timeout, state=state)
+        return True
 
-            if step_type == "click":
-                sel = self._wf_render(params.get("selector") or "", ctx).strip()
-                if not sel:
-                    return True
-                timeout = self._wf_int(params.get("timeout_ms"), None)
-                loc = page.locator(sel)
-                which = self._wf_render(params.get("which") or "", ctx).strip().lower()
-                if which == "last":
-                    loc = loc.last
-                elif which.isdigit():
-                    loc = loc.nth(int(which))
-                if timeout is None:
-                    await loc.click()
-                else:
-                    await loc.click(timeout=timeout)
-                return True
+    async def _wf_step_sleep(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        sec = self._wf_float(params.get("sec"), self.pre_fill_wait)
+        await asyncio.sleep(sec)
+        return True
 
-            if step_type == "fill":
-                sel = self._wf_render(params.get("selector") or "", ctx).strip()
-                text = self._wf_render(params.get("text") or "", ctx).replace("\\n", "\n")
-                if not sel:
-                    return True
-                await page.locator(sel).fill(text)
-                return True
+    async def _wf_step_click(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        sel = self._wf_render(params.get("selector") or "", ctx).strip()
+        if not sel:
+            return True
+        timeout = self._wf_int(params.get("timeout_ms"), None)
+        loc = page.locator(sel)
+        which = self._wf_render(params.get("which") or "", ctx).strip().lower()
+        if which == "last":
+            loc = loc.last
+        elif which.isdigit():
+            loc = loc.nth(int(which))
+        if timeout is None:
+            await loc.click()
+        else:
+            await loc.click(timeout=timeout)
+        return True
 
-            if step_type == "press":
-                sel = self._wf_render(params.get("selector") or "", ctx).strip()
-                key = self._wf_render(params.get("key") or "", ctx).strip()
-                if not sel or not key:
-                    return True
-                await page.press(sel, key)
-                return True
+    async def _wf_step_fill(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        sel = self._wf_render(params.get("selector") or "", ctx).strip()
+        text = self._wf_render(params.get("text") or "", ctx).replace("\\n", "\n")
+        if not sel:
+            return True
+        await page.locator(sel).fill(text)
+        return True
 
-            if step_type in ("select_episode_parts", "select_parts_by_episode"):
-                episode = self._wf_render(
-                    params.get("episode")
-                    or params.get("episode_name")
-                    or params.get("episode_title")
-                    or ctx.get("episode_id")
-                    or "",
-                    ctx,
-                ).strip()
-                title_selector = self._wf_render(params.get("title_selector") or "", ctx).strip()
-                checkbox_selector = self._wf_render(params.get("checkbox_selector") or "", ctx).strip()
-                button_selector = self._wf_render(
-                    params.get("button_selector") or params.get("after_button_selector") or "", ctx
-                ).strip()
-                timeout = self._wf_int(params.get("timeout_ms"), 60000)
-                hover_sec = self._wf_float(params.get("hover_sec"), 0.15)
-                card_xpath = str(params.get("card_xpath") or "xpath=ancestor::div[1]").strip()
-
-                if not episode or not title_selector or not checkbox_selector:
-                    return True
+    async def _wf_step_press(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        sel = self._wf_render(params.get("selector") or "", ctx).strip()
+        key = self._wf_render(params.get("key") or "", ctx).strip()
+        if not sel or not key:
+            return True
+        await page.press(sel, key)
+        return True
 
-                await page.wait_for_selector(title_selector, timeout=timeout)
-                titles = page.locator(title_selector).filter(has_text=episode)
-                cnt = await titles.count()
-                if cnt <= 0:
-                    return True
+    async def _wf_step_select_episode_parts(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        episode = self._wf_render(
+            params.get("episode")
+            or params.get("episode_name")
+            or params.get("episode_title")
+            or ctx.get("episode_id")
+            or "",
+            ctx,
+        ).strip()
+        title_selector = self._wf_render(params.get("title_selector") or "", ctx).strip()
+        checkbox_selector = self._wf_render(params.get("checkbox_selector") or "", ctx).strip()
+        button_selector = self._wf_render(
+            params.get("button_selector") or params.get("after_button_selector") or "", ctx
+        ).strip()
+        timeout = self._wf_int(params.get("timeout_ms"), 60000)
+        hover_sec = self._wf_float(params.get("hover_sec"), 0.15)
+        card_xpath = str(params.get("card_xpath") or "xpath=ancestor::div[1]").strip()
+
+        if not episode or not title_selector or not checkbox_selector:
+            return True
 
-                for i in range(cnt):
-                    tloc = titles.nth(i)
-                    card = tloc
-                    try:
-                        if card_xpath:
-                            card = tloc.locator(card_xpath)
-                    except Exception:
-                        card = tloc
+        await page.wait_for_selector(title_selector, timeout=timeout)
+        titles = page.locator(title_selector).filter(has_text=episode)
+        cnt = await titles.count()
+        if cnt <= 0:
+            return True
 
-                    try:
-                        await card.hover(timeout=timeout)
-                    except Exception:
-                        pass
-                    if hover_sec and hover_sec > 0:
-                        await asyncio.sleep(hover_sec)
+        for i in range(cnt):
+            tloc = titles.nth(i)
+            card = tloc
+            try:
+                if card_xpath:
+                    card = tloc.locator(card_xpath)
+            except Exception:
+                card = tloc
 
-                    cb = None
-                    try:
-                        cb = card.locator(checkbox_selector)
-                        if await cb.count() == 0:
-                            cb = page.locator(checkbox_selector)
-                    except Exception:
-                        cb = page.locator(checkbox_selector)
+            try:
+                await card.hover(timeout=timeout)
+            except Exception:
+                pass
+            if hover_sec and hover_sec > 0:
+                await asyncio.sleep(hover_sec)
 
-                    try:
-                        if cb is not None and await cb.count() > 0:
-                            await cb.first.click(timeout=timeout)
-                    except Exception:
-                        try:
-                            if cb is not None and await cb.count() > 0:
-                                await cb.first.click(timeout=timeout, force=True)
-                        except Exception:
-                            pass
+            cb = None
+            try:
+                cb = card.locator(checkbox_selector)
+                if await cb.count() == 0:
+                    cb = page.locator(checkbox_selector)
+            except Exception:
+                cb = page.locator(checkbox_selector)
 
-                if button_selector:
-                    try:
-                        await page.locator(button_selector).first.click(timeout=timeout)
-                    except Exception:
-                        try:
-                            await page.locator(button_selector).first.click(timeout=timeout, force=True)
-                        except Exception:
-                            pass
-                return True
+            try:
+                if cb is not None and await cb.count() > 0:
+                    await cb.first.click(timeout=timeout)
+            except Exception:
+                try:
+                    if cb is not None and await cb.count() > 0:
+                        await cb.first.click(timeout=timeout, force=True)
+                except Exception:
+                    pass
 
-            if step_type == "fill_scene":
-                inline_broll = None
-                if "handle_broll" in params:
-                    inline_broll = self._wf_bool(params.get("handle_broll"), True)
-                elif not has_broll_step:
-                    inline_broll = True
-                part_title = ""
+        if button_selector:
+            try:
+                await page.locator(button_selector).first.click(timeout=timeout)
+            except Exception:
                 try:
-                    part_title = str((scenes[0] or {}).get("title") or "")
+                    await page.locator(button_selector).first.click(timeout=timeout, force=True)
                 except Exception:
-                    part_title = ""
-                async def _set_title():
-                    return await self._apply_part_title(page, part_title)
-                await self.perform_step("set_part_title", _set_title, critical=False)
-                print(f"\\n📝 Начинаю заполнение {len(scenes)} сцен...")
-                success_count = 0
-                for idx, scene in enumerate(scenes, 1):
-                    try:
-                        async def _fill_one():
+                    pass
+        return True
+
+    async def _wf_step_fill_scene(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        inline_broll = None
+        if "handle_broll" in params:
+            inline_broll = self._wf_bool(params.get("handle_broll"), True)
+        elif not has_broll_step:
+            inline_broll = True
+        part_title = ""
+        try:
+            part_title = str((scenes[0] or {}).get("title") or "")
+        except Exception:
+            part_title = ""
+        async def _set_title():
+            return await self._apply_part_title(page, part_title)
+        await self.perform_step("set_part_title", _set_title, critical=False)
+        self._log(f"\n📝 Начинаю заполнение {len(scenes)} сцен...")
+        success_count = 0
+        scene_started = None
+        for scene in scenes:
+            scene_started = await self._pace_scene(scene_started)
+            try:
+                async def _fill_one():
+                    async with self._scene_gate():
+                        with self._scene_log():
                             return await self.fill_scene(page, scene['scene_idx'], scene['text'], scene.get('speaker'))
-                        safe_sp = self._normalize_speaker_key(scene.get('speaker'))
-                        step_name = f"fill_scene_{scene['scene_idx']}" if not safe_sp else f"fill_scene_{scene['scene_idx']}_{safe_sp}"
-                        ok = await self.perform_step(step_name, _fill_one, critical=True)
-                    except Exception as e:
-                        print(f"⚠️ Ошибка заполнения сцены {scene.get('scene_idx')}: {e}")
-                        ok = False
-                    if ok:
-                        success_count += 1
-                        try:
-                            if self.task_status:
-                                self.task_status.metrics.scenes_completed += 1
-                        except Exception:
-                            pass
-                        if inline_broll and str(scene.get('brolls', '')).strip():
+                safe_sp = self._normalize_speaker_key(scene.get('speaker'))
+                step_name = f"fill_scene_{scene['scene_idx']}" if not safe_sp else f"fill_scene_{scene['scene_idx']}_{safe_sp}"
+                ok = await self.perform_step(step_name, _fill_one, critical=True)
+            except Exception as e:
+                self._log(f"⚠️ Ошибка заполнения сцены {scene.get('scene_idx')}: {e}")
+                ok = False
+            if ok:
+                success_count += 1
+                try:
+                    if self.task_status:
+                        self.task_status.metrics.scenes_completed += 1
+                except Exception:
+                    pass
+                brolls = str(scene.get('brolls', '')).strip() if inline_broll else ""
+                if brolls:
+                    try:
+                        async def _broll_one():
+                            return await self.handle_broll_for_scene(page, scene['scene_idx'], brolls)
+                        ok_b = await self.perform_step(f"handle_broll_{scene['scene_idx']}", _broll_one, critical=False)
+                        if ok_b:
                             try:
-                                async def _broll_one():
-                                    return await self.handle_broll_for_scene(page, scene['scene_idx'], str(scene['brolls']).strip())
-                                ok_b = await self.perform_step(f"handle_broll_{scene['scene_idx']}", _broll_one, critical=False)
-                                if ok_b:
-                                    try:
-                                        if self.task_status:
-                                            self.task_status.metrics.brolls_inserted += 1
-                                    except Exception:
-                                        pass
-                            except Exception as e:
-                                print(f"⚠️ Ошибка обработки brolls для сцены {scene.get('scene_idx')}: {e}")
-                                if self.report is not None:
-                                    self.report['broll_errors'].append({'scene_idx': scene.get('scene_idx'), 'error': str(e)})
-                    if idx < len(scenes):
-                        await asyncio.sleep(self.delay_between_scenes)
-                print(f"\\n📊 Заполнено сцен: {success_count}/{len(scenes)}")
-                return True
+                                if self.task_status:
+                                    self.task_status.metrics.brolls_inserted += 1
+                            except Exception:
+                                pass
+                    except Exception as e:
+                        self._log(f"⚠️ Ошибка обработки brolls для сцены {scene.get('scene_idx')}: {e}")
+                        if self.report is not None:
+                            self.report['broll_errors'].append({'scene_idx': scene.get('scene_idx'), 'error': str(e)})
+        self._log(f"\n📊 Заполнено сцен: {success_count}/{len(scenes)}")
+        return True
 
-            if step_type == "handle_broll":
-                for scene in scenes:
-                    if str(scene.get('brolls', '')).strip():
-                        try:
-                            async def _broll_one():
-                                return await self.handle_broll_for_scene(page, scene['scene_idx'], str(scene['brolls']).strip())
-                            ok_b = await self.perform_step(f"handle_broll_{scene['scene_idx']}", _broll_one, critical=False)
-                            if ok_b:
-                                try:
-                                    if self.task_status:
-                                        self.task_status.metrics.brolls_inserted += 1
-                                except Exception:
-                                    pass
-                        except Exception as e:
-                            print(f"⚠️ Ошибка обработки brolls для сцены {scene.get('scene_idx')}: {e}")
-                            if self.report is not None:
-                                self.report['broll_errors'].append({'scene_idx': scene.get('scene_idx'), 'error': str(e)})
-                return True
+    async def _wf_step_handle_broll(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        broll_scenes = [(sc, str(sc.get('brolls', '')).strip()) for sc in scenes]
+        broll_scenes = [(sc, brolls) for sc, brolls in broll_scenes if brolls]
+        for pos, (scene, brolls) in enumerate(broll_scenes):
+            keep_open = pos + 1 < len(broll_scenes)
+            try:
+                async def _broll_one():
+                    return await self.handle_broll_for_scene(page, scene['scene_idx'], brolls, keep_panel_open=keep_open)
+                ok_b = await self.perform_step(f"handle_broll_{scene['scene_idx']}", _broll_one, critical=False)
+                if ok_b:
+                    try:
+                        if self.task_status:
+                            self.task_status.metrics.brolls_inserted += 1
+                    except Exception:
+                        pass
+            except Exception as e:
+                self._log(f"⚠️ Ошибка обработки brolls для сцены {scene.get('scene_idx')}: {e}")
+                if self.report is not None:
+                    self.report['broll_errors'].append({'scene_idx': scene.get('scene_idx'), 'error': str(e)})
+        return True
 
-            if step_type == "delete_empty_scenes":
-                max_scenes = self._wf_int(params.get("max_scenes"), self.max_scenes)
-                await self.delete_empty_scenes(page, len(scenes), max_scenes=max_scenes)
-                return True
+    async def _wf_step_delete_empty_scenes(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        max_scenes = self._wf_int(params.get("max_scenes"), self.max_scenes)
+        await self.delete_empty_scenes(page, len(scenes), max_scenes=max_scenes)
+        return True
 
-            if step_type == "save":
-                await self.click_save_and_wait(page)
-                return True
+    async def _wf_step_save(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        await self.click_save_and_wait(page)
+        return True
 
-            if step_type == "reload":
-                wait_until = str(params.get("wait_until") or "domcontentloaded").strip() or "domcontentloaded"
-                timeout = self._wf_int(params.get("timeout_ms"), self.reload_timeout_ms)
-                await page.reload(wait_until=wait_until, timeout=timeout)
-                sec = self._wf_float(params.get("post_wait_sec"), self.pre_fill_wait)
-                if sec > 0:
-                    await asyncio.sleep(sec)
-                return True
+    async def _wf_step_reload(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        wait_until = str(params.get("wait_until") or "domcontentloaded").strip() or "domcontentloaded"
+        timeout = self._wf_int(params.get("timeout_ms"), self.reload_timeout_ms)
+        await page.reload(wait_until=wait_until, timeout=timeout)
+        sec = self._wf_float(params.get("post_wait_sec"), self.pre_fill_wait)
+        if sec > 0:
+            await asyncio.sleep(sec)
+        return True
 
-            if step_type == "reload_and_validate":
-                interactive = self._wf_bool(params.get("interactive"), False)
-                validation = await self.refresh_and_validate(page, scenes, interactive=interactive)
-                if not validation.get('ok', True):
-                    print("⚠️ Проверка обнаружила несоответствия")
-                return True
+    async def _wf_step_reload_and_validate(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        interactive = self._wf_bool(params.get("interactive"), False)
+        validation = await self.refresh_and_validate(page, scenes, interactive=interactive)
+        if not validation.get('ok', True):
+            self._log("⚠️ Проверка обнаружила несоответствия")
+        return True
 
-            if step_type == "confirm":
-                if not self._generation_enabled():
-                    return True
-                return True
+    async def _wf_step_confirm(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        if not self._generation_enabled():
+            return True
+        return True
 
-            if step_type == "generate":
-                if not self._generation_enabled():
-                    return True
-                if self._should_block_generation():
-                    reason = self._block_generation_reason()
-                    await self.notify('HeyGen', f'Генерация заблокирована: {reason}')
-                    print("============================================================")
-                    print("Генерация заблокирована из-за пропусков/ошибок")
-                    if reason:
-                        print(f"Причина: {reason}")
-                    print("============================================================")
-                    if self.task_status:
-                        self.task_status.global_status = "failed"
-                    return False
-                await self.click_generate_button(page)
-                return True
+    async def _wf_step_generate(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        if not self._generation_enabled():
+            return True
+        blocked, reason = self._generation_gate()
+        if blocked:
+            await self.notify('HeyGen', f'Генерация заблокирована: {reason}')
+            self._log("============================================================")
+            self._log("Генерация заблокирована из-за пропусков/ошибок")
+            if reason:
+                self._log(f"Причина: {reason}")
+            self._log("============================================================")
+            if self.task_status:
+                self.task_status.global_status = "failed"
+            return False
+        await self.click_generate_button(page)
+        return True
 
-            if step_type == "final_submit":
-                if not self._generation_enabled():
-                    return True
-                if self._should_block_generation():
-                    reason = self._block_generation_reason()
-                    await self.notify('HeyGen', f'Генерация заблокирована: {reason}')
-                    print("============================================================")
-                    print("Генерация заблокирована из-за пропусков/ошибок")
-                    if reason:
-                        print(f"Причина: {reason}")
-                    print("============================================================")
-                    if self.task_status:
-                        self.task_status.global_status = "failed"
-                    return False
-                await self.fill_and_submit_final_window(page, title)
-                return True
+    async def _wf_step_final_submit(self, page: Page, params: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        if not self._generation_enabled():
+            return True
+        blocked, reason = self._generation_gate()
+        if blocked:
+            await self.notify('HeyGen', f'Генерация заблокирована: {reason}')
+            self._log("============================================================")
+            self._log("Генерация заблокирована из-за пропусков/ошибок")
+            if reason:
+                self._log(f"Причина: {reason}")
+            self._log("============================================================")
+            if self.task_status:
+                self.task_status.global_status = "failed"
+            return False
+        await self.fill_and_submit_final_window(page, str(ctx.get("title") or ""))
+        return True
+
+    # Тип шага воркфлоу -> имя метода-обработчика. Храним имена, а не bound-методы:
+    # воркеры вкладок — copy.copy(self), и обработчик должен вызываться на своём экземпляре
+    _WF_STEP_HANDLERS = {
+        "navigate_to_template": "_wf_step_navigate",
+        "navigate": "_wf_step_navigate",
+        "wait_for": "_wf_step_wait_for",
+        "wait_for_selector": "_wf_step_wait_for",
+        "wait": "_wf_step_sleep",
+        "sleep": "_wf_step_sleep",
+        "click": "_wf_step_click",
+        "fill": "_wf_step_fill",
+        "press": "_wf_step_press",
+        "select_episode_parts": "_wf_step_select_episode_parts",
+        "select_parts_by_episode": "_wf_step_select_episode_parts",
+        "fill_scene": "_wf_step_fill_scene",
+        "handle_broll": "_wf_step_handle_broll",
+        "delete_empty_scenes": "_wf_step_delete_empty_scenes",
+        "save": "_wf_step_save",
+        "reload": "_wf_step_reload",
+        "reload_and_validate": "_wf_step_reload_and_validate",
+        "confirm": "_wf_step_confirm",
+        "generate": "_wf_step_generate",
+        "final_submit": "_wf_step_final_submit",
+    }
 
+    @step("execute_workflow_step")
+    async def _execute_single_step(self, page: Page, raw: dict, ctx: dict, template_url: str, scenes: list, has_broll_step: bool) -> bool:
+        step_type = str(raw.get("type") or "").strip()
+        params = raw.get("params") if isinstance(raw.get("params"), dict) else {}
+        handler_name = self._WF_STEP_HANDLERS.get(step_type)
+        if handler_name is None:
             if step_type:
-                print(f"⚠️ Неизвестный шаг воркфлоу: {step_type}")
+                self._log(f"⚠️ Неизвестный шаг воркфлоу: {step_type}")
             return True
+        try:
+            return await getattr(self, handler_name)(page, params, ctx, template_url, scenes, has_broll_step)
         except Exception as e:
-            print(f"❌ Ошибка шага воркфлоу: type={step_type} err={e}")
+            self._log(f"❌ Ошибка шага воркфлоу: type={step_type} err={e}")
             return False
 
     @step("run_workflow")
     async def _run_workflow(self, page: Page, template_url: str, scenes: list, episode_id: str, part_idx: int, steps: list) -> bool:
-        print(f"DEBUG: _run_workflow called with {len(steps)} steps")
-        self.report = {
-            'validation_missing': [],
-            'broll_skipped': [],
-            'broll_no_results': [],
-            'broll_errors': [],
-            'manual_intervention': []
-        }
+        self._log(f"DEBUG: _run_workflow called with {len(steps)} steps")
+        self.report = self._new_report()
         has_broll_step = False
         try:
             for s in steps or []:
@@ -2381,13 +2830,13 @@ class HeyGenAutomation:
         }
 
         for i, raw in enumerate(steps):
-            print(f"DEBUG: Processing step {i}")
+            self._log(f"DEBUG: Processing step {i}")
             if not isinstance(raw, dict):
                 continue
             if "enabled" in raw and not self._wf_bool(raw.get("enabled"), True):
                 continue
             ok = await self._execute_single_step(page, raw, ctx, template_url, scenes, has_broll_step)
-            print(f"DEBUG: Step {i} result: {ok}")
+            self._log(f"DEBUG: Step {i} result: {ok}")
             if not ok:
                 return False
 
@@ -2396,10 +2845,10 @@ class HeyGenAutomation:
                 await self.click_save_and_wait(page)
                 return True
             await self.perform_step("save_before_exit", _save_only, critical=False)
-            print(f"\n✅ Часть {part_idx} обработана и сохранена без генерации!")
+            self._log(f"\n✅ Часть {part_idx} обработана и сохранена без генерации!")
             return True
 
-        print(f"\n✅ Часть {part_idx} обработана и отправлена на генерацию!")
+        self._log(f"\n✅ Часть {part_idx} обработана и отправлена на генерацию!")
         return True
 
     async def confirm_before_generation(self) -> bool:
@@ -2445,59 +2894,43 @@ class HeyGenAutomation:
 
     async def _detect_broll_state_after_canvas_click(self, page: Page) -> str:
         try:
-            await asyncio.sleep(2.0)
+            # Ждём окончания вставки (aria-busy), а не фиксированные 2 секунды
+            try:
+                await page.wait_for_function(
+                    "() => !document.querySelector('[aria-busy=\"true\"]')",
+                    timeout=2000,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
             await self._focus_canvas_for_validation(page)
-            await asyncio.sleep(0.2)
 
-            ok_btn = page.get_by_role(
-                "button",
-                name=re.compile(
-                    r"^(Detach from BG|Change BG|Detach|Change BG)$",
-                    re.I,
-                ),
-            )
-            set_as_bg_btn = page.get_by_role(
-                "button",
-                name=re.compile(
-                    r"^(Set as BG|Set as Background|Set as background|Make background|"
-                    r"Сделать фоном|Сделать фон|Установить как фон)$",
-                    re.I,
-                ),
-            )
-            set_as_bg_menu = page.get_by_role(
-                "menuitem",
-                name=re.compile(
-                    r"(Set as BG|Set as Background|Set as background|Make background|"
-                    r"Сделать фоном|Сделать фон|Установить как фон)",
-                    re.I,
-                ),
-            )
-            bg_color_btn = page.get_by_role(
-                "button",
-                name=re.compile(
-                    r"^(BG\s*Color|BG\s*Colour|Цвет\s*BG|BG\s*Цвет)$",
-                    re.I,
-                ),
-            )
+            ok_btn = page.get_by_role("button", name=_RX_BG_ATTACHED)
+            set_as_bg_btn = page.get_by_role("button", name=_RX_SET_AS_BG_EXACT)
+            set_as_bg_menu = page.get_by_role("menuitem", name=_RX_SET_AS_BG)
+            bg_color_btn = page.get_by_role("button", name=_RX_BG_COLOR)
+            # Просыпаемся на первом появившемся индикаторе состояния; порядок приоритета ниже
+            await self._race_visible([ok_btn, set_as_bg_btn, set_as_bg_menu, bg_color_btn], 2.0)
 
             try:
-                if await ok_btn.count() > 0 and await ok_btn.first.is_visible():
+                if await ok_btn.first.is_visible():
                     return "ok"
             except Exception:
                 pass
             try:
-                if await set_as_bg_btn.count() > 0 and await set_as_bg_btn.first.is_visible():
+                if await set_as_bg_btn.first.is_visible():
                     return "needs_set_bg"
             except Exception:
                 pass
             try:
-                if await set_as_bg_menu.count() > 0 and await set_as_bg_menu.first.is_visible():
+                if await set_as_bg_menu.first.is_visible():
                     return "needs_set_bg"
             except Exception:
                 pass
 
             try:
-                if await bg_color_btn.count() > 0 and await bg_color_btn.first.is_visible():
+                if await bg_color_btn.first.is_visible():
                     return "empty_canvas"
             except Exception:
                 pass
@@ -2508,23 +2941,39 @@ class HeyGenAutomation:
         except Exception:
             return "unknown"
 
+    async def _pace_scene(self, last_start: float | None) -> float:
+        """Пауза между сценами как ограничитель частоты: отсчёт от начала предыдущей сцены, а не от её конца"""
+        loop = asyncio.get_running_loop()
+        if last_start is not None:
+            remaining = self.delay_between_scenes - (loop.time() - last_start)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        return loop.time()
+
+    async def _race_visible(self, locators: list, timeout_sec: float) -> bool:
+        """Дождаться, пока станет видим любой из локаторов; проигравшие ожидания отменяются"""
+        tasks = [
+            asyncio.ensure_future(loc.first.wait_for(state='visible', timeout=timeout_sec * 1000))
+            for loc in locators
+        ]
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=timeout_sec, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    return False
+                if any(not t.cancelled() and t.exception() is None for t in done):
+                    return True
+            return False
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def _click_set_as_bg_if_present(self, page: Page) -> bool:
-        set_as_bg_btn = page.get_by_role(
-            "button",
-            name=re.compile(
-                r"^(Set as BG|Set as Background|Set as background|Make background|"
-                r"Сделать фоном|Сделать фон|Установить как фон)$",
-                re.I,
-            ),
-        ).first
-        set_as_bg_menu = page.get_by_role(
-            "menuitem",
-            name=re.compile(
-                r"(Set as BG|Set as Background|Set as background|Make background|"
-                r"Сделать фоном|Сделать фон|Установить как фон)",
-                re.I,
-            ),
-        ).first
+        set_as_bg_btn = page.get_by_role("button", name=_RX_SET_AS_BG_EXACT).first
+        set_as_bg_menu = page.get_by_role("menuitem", name=_RX_SET_AS_BG).first
         try:
             if await set_as_bg_btn.count() > 0:
                 try:
@@ -2553,7 +3002,7 @@ class HeyGenAutomation:
             pass
         return False
 
-    async def handle_broll_for_scene(self, page: Page, scene_idx: int, query: str) -> bool:
+    async def handle_broll_for_scene(self, page: Page, scene_idx: int, query: str, keep_panel_open: bool = False) -> bool:
         self._emit_notice(f"🎞️ broll_start: scene={scene_idx} query={query}")
         self._emit_step({"type": "start_broll", "scene": scene_idx})
         if not query or str(query).strip() == '' or str(query).strip().lower() == 'nan':
@@ -2569,9 +3018,7 @@ class HeyGenAutomation:
             out_dir = os.path.join(str(settings.local_storage_path or "./storage"), "nano_banano")
             try:
                 text_label = f"text_{scene_idx}"
-                span_locator = page.locator('span[data-node-view-content-react]').filter(
-                    has_text=re.compile(rf'^\s*{re.escape(text_label)}\s*$')
-                )
+                span_locator = self._scene_span(page, text_label)
             except Exception:
                 span_locator = None
 
@@ -2662,9 +3109,7 @@ class HeyGenAutomation:
 
         try:
             text_label = f"text_{scene_idx}"
-            span_locator = page.locator('span[data-node-view-content-react]').filter(
-                has_text=re.compile(rf'^\s*{re.escape(text_label)}\s*$')
-            )
+            span_locator = self._scene_span(page, text_label)
         except Exception:
             span_locator = None
 
@@ -2685,6 +3130,13 @@ class HeyGenAutomation:
         last_validation_reason = ""
 
         for attempt in range(1, 4):
+            # Панель, оставленная открытой прошлой сценой, уже на вкладке Видео с нужными фильтрами;
+            # состояние одноразовое и на повторных попытках не используется
+            panel_memo = self._broll_panel_state if attempt == 1 else None
+            self._broll_panel_state = None
+            if panel_memo is not None and panel_memo.get("page") is not page:
+                panel_memo = None
+
             await self._await_gate()
             await _select_scene_best_effort()
             try:
@@ -2692,6 +3144,13 @@ class HeyGenAutomation:
             except Exception:
                 pass
 
+            if panel_memo is not None:
+                try:
+                    if await self._bind_page(page)["media_header"].count() == 0:
+                        panel_memo = None
+                except Exception:
+                    panel_memo = None
+
             if not await self._open_media_panel(page):
                 err = "не удалось открыть панель Медиа"
                 self._emit_notice(f"❌ broll_error: {err}")
@@ -2705,7 +3164,7 @@ class HeyGenAutomation:
 
             await self._broll_pause(0.2)
 
-            if not await self._select_video_tab(page):
+            if panel_memo is None and not await self._select_video_tab(page):
                 err = "вкладка Видео/Video не найдена"
                 self._emit_notice(f"❌ broll_error: {err}")
                 await self._take_error_screenshot(page, f"broll_tab_fail_{scene_idx}")
@@ -2720,17 +3179,20 @@ class HeyGenAutomation:
             async def _gate():
                 await self._await_gate()
             
-            if self.media_source not in ['all', 'все', '']:
+            ok_source = True
+            if self.media_source not in ['all', 'все', ''] and (panel_memo is None or panel_memo.get("source") != self.media_source):
                 self._emit_notice(f"📂 broll_source: {self.media_source}")
                 ok_source = await select_media_source(page, self.media_source, gate_callback=_gate)
                 if not ok_source:
                     self._emit_notice(f"⚠️ не удалось выбрать источник: {self.media_source}")
 
             choice = self.orientation_choice or 'Горизонтальная'
-            self._emit_notice(f"📐 broll_orientation: {choice}")
-            ok_orient = await select_orientation(page, choice, gate_callback=_gate)
+            ok_orient = panel_memo is not None and panel_memo.get("orientation") == choice
             if not ok_orient:
-                self._emit_notice(f"⚠️ не удалось выбрать ориентацию: {choice}")
+                self._emit_notice(f"📐 broll_orientation: {choice}")
+                ok_orient = await select_orientation(page, choice, gate_callback=_gate)
+                if not ok_orient:
+                    self._emit_notice(f"⚠️ не удалось выбрать ориентацию: {choice}")
 
             await self._broll_pause(0.2)
 
@@ -2738,8 +3200,15 @@ class HeyGenAutomation:
 
             current_query = str(query).strip()
             found = False
-
-            while True:
+            cache_key = _RX_WS.sub(" ", current_query).lower()
+            cached_query = self._broll_query_cache.get(cache_key, "")
+            if cached_query is None:
+                self._emit_notice(f"ℹ️ broll_cache_hit: scene={scene_idx} query='{query}' result=no_results")
+            elif cached_query:
+                self._emit_notice(f"ℹ️ broll_cache_hit: scene={scene_idx} query='{query}' result='{cached_query}'")
+                current_query = cached_query
+
+            while cached_query is not None:
                 await self._await_gate()
 
                 search_input = await self._locate_broll_search_input(page)
@@ -2754,24 +3223,24 @@ class HeyGenAutomation:
                     self._emit_step({"type": "finish_broll", "scene": scene_idx, "ok": False})
                     return False
 
+                await self._await_gate()
                 try:
-                    await search_input.scroll_into_view_if_needed()
+                    prev_results = await page.evaluate(_JS_BROLL_RESULTS_STATE)
                 except Exception:
-                    pass
+                    prev_results = None
                 try:
-                    await search_input.click(timeout=3000)
-                except Exception:
+                    # fill сам фокусирует, прокручивает и заменяет значение одним вызовом
                     try:
-                        await search_input.click(timeout=3000, force=True)
+                        await search_input.fill(current_query, timeout=6000)
                     except Exception:
-                        pass
-
-                await self._await_gate()
-                try:
-                    await page.keyboard.press('Meta+A')
-                    await page.keyboard.press('Backspace')
-                    await page.keyboard.insert_text(current_query)
-                    await page.keyboard.press('Enter')
+                        try:
+                            await search_input.fill(current_query, timeout=6000, force=True)
+                        except Exception:
+                            await search_input.click(timeout=3000, force=True)
+                            await page.keyboard.press('Meta+A')
+                            await page.keyboard.press('Backspace')
+                            await search_input.press_sequentially(current_query, delay=0)
+                    await search_input.press('Enter')
                 except Exception as e:
                     err = f"не удалось ввести запрос B-roll: {e}"
                     self._emit_notice(f"❌ broll_error: {err}")
@@ -2781,15 +3250,17 @@ class HeyGenAutomation:
                     self._emit_step({"type": "finish_broll", "scene": scene_idx, "ok": False})
                     return False
 
-                await page.wait_for_timeout(3000)
+                # Вместо фиксированных 3 c ждём смены выдачи; 3 c остаются верхней границей
+                if prev_results is None:
+                    await page.wait_for_timeout(3000)
+                else:
+                    try:
+                        await page.wait_for_function(_JS_BROLL_RESULTS_CHANGED, arg=prev_results, timeout=3000)
+                    except Exception:
+                        pass
 
                 try:
-                    media_header = page.get_by_role(
-                        "heading",
-                        level=2,
-                        name=re.compile(r"^\s*(Медиа|Media)\s*$", re.I),
-                    )
-                    media_panel = page.locator("aside, section, div").filter(has=media_header).first
+                    media_panel = self._bind_page(page)["media_panel"]
                     active_panel = media_panel.locator('[role="tabpanel"][data-state="active"]').first
                     try:
                         if await active_panel.count() == 0:
@@ -2798,7 +3269,7 @@ class HeyGenAutomation:
                         active_panel = media_panel
 
                     no_data = active_panel.locator('div:not(.tw-hidden)').filter(
-                        has_text=re.compile(r"\b(No\s+data|No\s+results\s+found)\b", re.I)
+                        has_text=_RX_NO_RESULTS
                     )
                     has_no_data = await no_data.count() > 0
                 except Exception:
@@ -2819,41 +3290,11 @@ class HeyGenAutomation:
                 try:
                     await imgs.first.wait_for(state='attached', timeout=20000)
                     first_img = None
-                    vs = None
-                    try:
-                        vs = page.viewport_size
-                    except Exception:
-                        vs = None
-                    if vs and vs.get("width"):
-                        vw = float(vs["width"])
-                    else:
-                        try:
-                            vw = float(await page.evaluate("() => window.innerWidth"))
-                        except Exception:
-                            vw = 0.0
-                    try:
-                        cnt = await imgs.count()
-                    except Exception:
-                        cnt = 0
-                    for i in range(min(cnt, 60)):
-                        cand = imgs.nth(i)
-                        try:
-                            box = await cand.bounding_box()
-                            if not box:
-                                continue
-                            if vw and float(box.get("x", 0.0)) <= vw * 0.5:
-                                continue
-                            try:
-                                nw = int(await cand.evaluate("el => el.naturalWidth || 0"))
-                            except Exception:
-                                nw = 0
-                            if nw <= 1:
-                                continue
-                            if await cand.is_visible():
-                                first_img = cand
-                                break
-                        except Exception:
-                            continue
+                    first_box = None
+                    hit = await imgs.evaluate_all(_JS_FIRST_BROLL_CARD, 60)
+                    if hit:
+                        first_img = imgs.nth(int(hit["index"]))
+                        first_box = hit["box"] if hit.get("inViewport") else None
                     if first_img is None:
                         raise RuntimeError("no visible broll results")
                 except Exception:
@@ -2864,7 +3305,7 @@ class HeyGenAutomation:
                         continue
                     break
 
-                clicked = await human_coordinate_click(page, first_img)
+                clicked = await human_coordinate_click(page, first_img, box=first_box)
                 if clicked:
                     found = True
                     break
@@ -2877,6 +3318,7 @@ class HeyGenAutomation:
                 self._emit_step({"type": "finish_broll", "scene": scene_idx, "ok": False})
                 return False
             
+            self._broll_query_cache[cache_key] = current_query if found else None
             if not found:
                 err = f"результаты не найдены для запроса '{query}'"
                 self._emit_notice(f"❌ broll_no_results: {err}")
@@ -2905,7 +3347,7 @@ class HeyGenAutomation:
                     await asyncio.sleep(0.2)
                     detach_btn = page.get_by_role(
                         "button",
-                        name=re.compile(r"^(Detach from BG|Открепить от BG|Открепить от фона)$", re.I),
+                        name=_RX_DETACH_BG,
                     ).first
                     if await detach_btn.count() > 0:
                         try:
@@ -2946,17 +3388,25 @@ class HeyGenAutomation:
                 last_validation_reason = ""
 
             if state == "ok":
-                if self.close_media_panel_after_broll:
+                # Панель не закрываем, если следующая сцена тоже с B-roll — она переиспользует открытую панель
+                if self.close_media_panel_after_broll and not keep_panel_open:
                     try:
-                        close_btn = page.locator('button:has(iconpark-icon[name="close"])')
+                        close_btn = self._bind_page(page)["close_button"]
                         if await close_btn.count() > 0:
                             await close_btn.first.click(timeout=5000)
                             await self._broll_pause(0.2)
                     except Exception:
                         pass
+                else:
+                    self._broll_panel_state = {
+                        "page": page,
+                        "source": self.media_source if ok_source else None,
+                        "orientation": choice if ok_orient else None,
+                    }
 
                 self._emit_notice(f"✅ broll_done: scene={scene_idx}")
-                await self._take_error_screenshot(page, f"broll_done_{scene_idx}")
+                if self.broll_success_screenshots:
+                    await self._take_error_screenshot(page, f"broll_done_{scene_idx}")
                 self._emit_step({"type": "finish_broll", "scene": scene_idx, "ok": True})
                 return True
 
@@ -2988,22 +3438,16 @@ class HeyGenAutomation:
         wait_ms = max(int(self.save_notification_timeout_ms), 40000)
 
         async def _wait_saved() -> bool:
-            try:
-                notif_ru = page.locator('div').filter(has_text=re.compile(r'^\s*Сохранено\s*$'))
-                if await notif_ru.count() > 0:
-                    loc = notif_ru.nth(2) if await notif_ru.count() > 2 else notif_ru.first
-                    await loc.wait_for(state='visible', timeout=wait_ms)
-                    return True
-            except Exception:
-                pass
-            try:
-                notif_en = page.locator('div').filter(has_text=re.compile(r'^\s*Saved\s*$'))
-                if await notif_en.count() > 0:
-                    loc = notif_en.nth(2) if await notif_en.count() > 2 else notif_en.first
-                    await loc.wait_for(state='visible', timeout=wait_ms)
-                    return True
-            except Exception:
-                pass
+            for rx in (_RX_SAVED_RU, _RX_SAVED_EN):
+                try:
+                    notif = page.locator('div').filter(has_text=rx)
+                    cnt = await notif.count()
+                    if cnt > 0:
+                        loc = notif.nth(2) if cnt > 2 else notif.first
+                        await loc.wait_for(state='visible', timeout=wait_ms)
+                        return True
+                except Exception:
+                    pass
             return False
 
         try:
@@ -3021,9 +3465,10 @@ class HeyGenAutomation:
                 except Exception:
                     pass
                 try:
-                    save_item = page.locator('div').filter(has_text=re.compile(r'^\s*Сохранить\s*$'))
-                    if await save_item.count() > 0:
-                        target = save_item.nth(3) if await save_item.count() > 3 else save_item.first
+                    save_item = page.locator('div').filter(has_text=_RX_SAVE_ITEM)
+                    cnt = await save_item.count()
+                    if cnt > 0:
+                        target = save_item.nth(3) if cnt > 3 else save_item.first
                         await target.click(timeout=5000)
                 except Exception:
                     pass
@@ -3031,17 +3476,11 @@ class HeyGenAutomation:
 
             if not saved:
                 try:
-                    btn = page.locator('button:has(iconpark-icon[name="saved"])')
-                    if await btn.count() == 0:
-                        ico = page.locator('iconpark-icon[name="saved"]')
-                        if await ico.count() > 0:
-                            btn = ico.first.locator('xpath=ancestor::button[1]')
-                    if await btn.count() > 0:
+                    # Кнопка с иконкой saved (сама или ближайший предок-кнопка) — одним запросом
+                    if await page.evaluate(_JS_SAVED_ICON_BUTTON):
+                        btn = page.locator('button:has(iconpark-icon[name="saved"])').first
                         await self._await_gate()
-                        await btn.first.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.1)
-                        await self._await_gate()
-                        await btn.first.click(timeout=5000)
+                        await btn.click(timeout=5000)
                         await _wait_saved()
                 except Exception:
                     pass
@@ -3057,10 +3496,7 @@ class HeyGenAutomation:
             await asyncio.sleep(self.save_fallback_wait_sec)
 
     async def bring_terminal_to_front(self):
-        try:
-            subprocess.Popen(['osascript', '-e', 'tell application "Terminal" to activate'])
-        except Exception:
-            pass
+        _spawn_osascript('tell application "Terminal" to activate')
 
     @step("close_browser")
     async def close_browser(self):
@@ -3122,7 +3558,13 @@ class HeyGenAutomation:
     async def refresh_and_validate(self, page: Page, scenes: list, interactive: bool = True):
         print("\n🔄 Обновляю страницу для проверки вставленных текстов (2 reload)...")
         scenes_by_idx = {int(s['scene_idx']): s['text'] for s in scenes}
+        strip_brackets = self._enable_enhance_voice
         changed = False
+        # Тексты span'ов после последнего чтения; None — DOM мог измениться и нужно перечитать
+        span_texts = None
+
+        async def _read_span_texts() -> list:
+            return list(await page.evaluate(_JS_SCENE_SPAN_TEXTS, _SCENE_SPAN_SEL) or [])
 
         async def _reload_once(round_idx: int):
             try:
@@ -3149,26 +3591,26 @@ class HeyGenAutomation:
                 return False
 
         async def _fix_placeholders(round_idx: int):
+            nonlocal span_texts
+            span_texts = None
             try:
-                locator = page.locator("span[data-node-view-content-react]")
-                texts = await locator.all_inner_texts()
+                texts = await _read_span_texts()
                 remaining = []
                 for t in texts:
-                    m = re.fullmatch(r"\s*text_(\d+)\s*", t or "")
+                    m = _RX_TEXT_LABEL.match(t or "")
                     if m:
                         remaining.append(int(m.group(1)))
                 if remaining:
                     print(f"⚠️ Найдены не заполненные плейсхолдеры (round={round_idx}): {remaining}")
-                any_fixed = False
-                for idx in remaining:
-                    await self._await_gate()
-                    expected = scenes_by_idx.get(idx)
-                    if expected:
-                        await self.fill_scene(page, idx, expected)
-                        await self._await_gate()
-                        await asyncio.sleep(0.2)
-                        any_fixed = True
-                return {"fixed": any_fixed, "remaining": remaining}
+                to_fix = [
+                    {'scene_idx': idx, 'text': scenes_by_idx[idx]}
+                    for idx in remaining
+                    if scenes_by_idx.get(idx)
+                ]
+                fixed = await self.fill_scenes_batch(page, to_fix, pause_sec=0.2)
+                if not to_fix:
+                    span_texts = texts
+                return {"fixed": bool(fixed), "remaining": remaining}
             except Exception as e:
                 print(f"⚠️ Не удалось выполнить проверку плейсхолдеров (round={round_idx}): {e}")
                 return {"fixed": False, "remaining": []}
@@ -3195,57 +3637,65 @@ class HeyGenAutomation:
         # Проверка наличия ожидаемых текстов
         print("\n🔍 Проверяю наличие ожидаемых текстов из CSV...")
         missing = []
-        # Получаем все текущие тексты из страницы один раз
+        # Получаем все текущие тексты из страницы один раз (после последнего reload они уже прочитаны)
         try:
-            locator_all = page.locator('span[data-node-view-content-react]')
-            all_texts = [self.normalize_text_for_compare(t) for t in await locator_all.all_inner_texts()]
+            if span_texts is None:
+                span_texts = await _read_span_texts()
+            all_texts = [self.normalize_text_for_compare(t, strip_brackets) for t in span_texts]
         except Exception:
             all_texts = []
-        for s in scenes:
+        # Наличие текстов и оставшиеся плейсхолдеры text_N — из одного снимка, без запросов на каждую сцену
+        all_set = set(all_texts)
+        expected_norms = [self.normalize_text_for_compare(s['text'], strip_brackets) for s in scenes]
+        absent = []
+        if not all_set.issuperset(expected_norms) or not all(expected_norms):
+            # Обычный случай — все тексты на месте, и дальше по сценам идти незачем
+            absent = [
+                (int(s['scene_idx']), s, expected_text)
+                for s, expected_text in zip(scenes, expected_norms)
+                if not (expected_text and expected_text in all_set)
+            ]
+        placeholders = {int(m.group(1)) for m in map(_RX_TEXT_LABEL.match, all_texts) if m} if absent else set()
+        # Автоисправление: только сцены с явным плейсхолдером text_N (опасный фолбэк по индексу,
+        # перезаписывавший заполненные сцены, удалён). Все такие сцены чиним одним пакетом,
+        # затем одно перечитывание вместо чтения после каждой
+        to_fix = [
+            {'scene_idx': scene_idx, 'text': s['text']}
+            for scene_idx, s, _ in absent
+            if scene_idx in placeholders
+        ]
+        if to_fix:
             await self._await_gate()
-            expected_text = self.normalize_text_for_compare(s['text'])
-            scene_idx = int(s['scene_idx'])
-            present = expected_text and (expected_text in all_texts)
-            if not present:
-                # Попытка автоисправления: placeholder text_X
-                auto_fixed = False
-                try:
-                    ph = page.locator('span[data-node-view-content-react]').filter(has_text=re.compile(rf'^\s*text_{scene_idx}\s*$'))
-                    if await ph.count() > 0:
-                        await self.fill_scene(page, scene_idx, s['text'])
-                        await self._await_gate()
-                        await asyncio.sleep(0.2)
-                        auto_fixed = True
-                except Exception:
-                    pass
-                
-                # Удален опасный фолбэк по индексу, который перезаписывал заполненные сцены.
-                # Теперь мы полагаемся только на явное наличие text_N (auto_fixed).
-                
-                if auto_fixed:
-                    try:
-                        locator_all2 = page.locator('span[data-node-view-content-react]')
-                        all_texts = [self.normalize_text_for_compare(t) for t in await locator_all2.all_inner_texts()]
-                    except Exception:
-                        pass
-                    changed = True
-                    present = expected_text and (expected_text in all_texts)
-                if not present:
-                    print(f"\n========================================")
-                    print(f"❌ Текст отсутствует после автоисправления: scene_idx={scene_idx}")
-                    print(f"========================================\n")
-                    missing.append(scene_idx)
+            fixed = 0
+            try:
+                fixed = await self.fill_scenes_batch(page, to_fix, pause_sec=0.2)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            if fixed:
+                changed = True
+            try:
+                span_texts = await _read_span_texts()
+                all_texts = [self.normalize_text_for_compare(t, strip_brackets) for t in span_texts]
+                all_set = set(all_texts)
+            except Exception:
+                pass
+        for scene_idx, s, expected_text in absent:
+            if not (expected_text and expected_text in all_set):
+                print(f"\n========================================")
+                print(f"❌ Текст отсутствует после автоисправления: scene_idx={scene_idx}")
+                print(f"========================================\n")
+                missing.append(scene_idx)
         if not missing:
             print("✅ Все ожидаемые тексты обнаружены на странице")
         else:
             print(f"⚠️ Остались несоответствия в сценах: {missing}")
 
-        # Поиск подозрительных текстов, которых нет в CSV
+        # Поиск подозрительных текстов, которых нет в CSV (all_texts актуален: перечитывается после автоисправления)
         try:
-            locator = page.locator('span[data-node-view-content-react]')
-            all_texts = [self.normalize_text_for_compare(t) for t in await locator.all_inner_texts()]
-            expected_set = {self.normalize_text_for_compare(s['text']) for s in scenes}
-            unknown = [t for t in all_texts if t and not re.fullmatch(r'text_\d+', t) and t not in expected_set]
+            expected_set = set(expected_norms)
+            unknown = [t for t in all_texts if t and not _RX_TEXT_LABEL.match(t) and t not in expected_set]
             if unknown:
                 print(f"⚠️ Обнаружены незнакомые тексты (возможные фантомы): {unknown}")
         except Exception:
@@ -3257,10 +3707,13 @@ class HeyGenAutomation:
         if self.enable_notifications and missing:
             await self.notify('HeyGen', f'Несоответствия: {missing}')
         if self.report is not None and missing:
-            for m in missing:
-                self.report['validation_missing'].append({'scene_idx': m})
+            self.report['validation_missing'].extend({'scene_idx': m} for m in missing)
         return {'ok': ok, 'changed': changed, 'missing': missing}
 
+    def _new_report(self) -> dict:
+        """Пустой отчёт части с фиксированным набором ключей"""
+        return {key: [] for key in _REPORT_KEYS}
+
     def print_final_report(self):
         if not self.report:
             return
@@ -3279,14 +3732,103 @@ class HeyGenAutomation:
     async def notify(self, title: str, message: str):
         if not self.enable_notifications:
             return
-        try:
-            subprocess.Popen(['osascript', '-e', f'display notification "{message}" with title "{title}"'])
+        _spawn_osascript(f'display notification {_applescript_str(message)} with title {_applescript_str(title)}')
+
+    async def process_on_tab(self, episode_id: str, part_idx: int) -> bool:
+        """
+        Обработать часть эпизода в отдельной вкладке общего браузера
+        
+        Работает на поверхностной копии автоматизации. Общими остаются только
+        данные CSV, конфиг, хуки и сами события паузы (список событий у воркера свой).
+        Страница, отчёт, статус задачи и кэши селекторов — свои.
+        Живой статус части доступен в self.task_statuses[(episode_id, part_idx)]
+        с момента старта, итоговый отчёт — в self.reports[(episode_id, part_idx)].
+        
+        Args:
+            episode_id: ID эпизода
+            part_idx: Номер части
+            
+        Returns:
+            bool: Успешно ли обработана часть
+        """
+        ctx = self.playwright_context
+        if ctx is None:
+            if not await self._ensure_browser():
+                return False
+            ctx = self.playwright_context
+        if ctx is None:
+            return False
+        key = (str(episode_id), int(part_idx))
+        statuses = self.task_statuses
+        statuses.pop(key, None)
+        worker = copy.copy(self)
+        worker.report = None
+        worker.reports = {}
+        worker.task_status = None
+        worker.task_statuses = {}
+        worker._status_sink = lambda status: statuses.__setitem__(key, status)
+        worker.pause_events = list(self.pause_events)
+        worker._bound_page = None
+        worker._page_locs = {}
+        worker._broll_panel_state = None
+        worker._log_buffered = False
+        worker._log_buf = []
+        worker._cached_generate_selector = dict(self._cached_generate_selector)
+        worker._broll_query_cache = dict(self._broll_query_cache)
+        page = await ctx.new_page()
+        try:
+            page.set_default_timeout(self._cfg_playwright_timeout_ms)
         except Exception:
             pass
+        worker._page = page
+        try:
+            return bool(await worker.process_episode_part(episode_id, part_idx, page=page))
+        finally:
+            self.reports[key] = worker.report
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def run_parts_parallel(self, jobs: list, max_parallel: int = 4) -> dict:
+        """
+        Обработать несколько частей параллельно, по вкладке на часть
+        
+        Args:
+            jobs: Список пар (episode_id, part_idx)
+            max_parallel: Максимум одновременно открытых вкладок
+            
+        Returns:
+            Словарь {(episode_id, part_idx): успех}
+        """
+        if not jobs:
+            return {}
+        if not await self._ensure_browser():
+            return {(str(ep), int(part)): False for ep, part in jobs}
+        sem = asyncio.Semaphore(max(1, int(max_parallel)))
+
+        async def _bounded(ep, part):
+            async with sem:
+                return await self.process_on_tab(ep, part)
+
+        results = await asyncio.gather(*[_bounded(ep, part) for ep, part in jobs], return_exceptions=True)
+        out = {}
+        for (ep, part), res in zip(jobs, results):
+            if isinstance(res, BaseException):
+                if isinstance(res, asyncio.CancelledError):
+                    raise res
+                print(f"❌ Ошибка обработки части эпизода {ep} part={part}: {res}")
+            out[(str(ep), int(part))] = res is True
+        return out
 
     async def process_many(self, episodes: list):
         if not episodes:
             return False
+        max_parallel = int(self.config.get('max_concurrency', 1) or 1)
+        if max_parallel > 1 and str(self.config.get('parallel_mode', 'tabs')) == 'tabs':
+            jobs = [(ep, part_idx) for ep in episodes for part_idx in self.get_all_episode_parts(ep)]
+            results = await self.run_parts_parallel(jobs, max_parallel=max_parallel)
+            return bool(results) and all(results.values())
         ok = True
         for ep in episodes:
             parts = self.get_all_episode_parts(ep)
@@ -3437,7 +3979,10 @@ async def main():
     print(f"🚀 Запускаю обработку эпизодов: {episodes}")
     print("=" * 60 + "\n")
     
-    await automation.process_many(episodes)
+    try:
+        await automation.process_many(episodes)
+    finally:
+        await automation.aclose()
 
 
 if __name__ == "__main__":
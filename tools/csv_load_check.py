@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from ui.runner import AutomationRunner
+
+
+# Пустая колонка brolls и «числовой» text с пропуском — обычный CSV, который должен читаться
+_CSV = (
+    "episode_id;part_idx;scene_idx;speaker;text;title;template_url;brolls\n"
+    "ep1;1;1;;123;;https://example.com/t;\n"
+    "ep1;1;2;;;;https://example.com/t;\n"
+    "ep1;1;3;;4.5;;https://example.com/t;\n"
+)
+
+
+def _run() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "check.csv")
+        with open(csv_path, "w", encoding="utf-8") as handle:
+            handle.write(_CSV)
+        config_path = os.path.join(tmp, "config.json")
+        with open(config_path, "w", encoding="utf-8") as handle:
+            json.dump({"csv_file": csv_path, "csv_parse_cache": False}, handle)
+        try:
+            runner = AutomationRunner(config_path)
+            automation = runner.automation
+            automation.load_data()
+            _, scenes = automation.get_episode_data("ep1", 1)
+            runner.apply_episode_overrides("ep1", "Override", None)
+            _, overridden = automation.get_episode_data("ep1", 1)
+        except Exception as e:
+            print(f"❌ CSV не загрузился: {type(e).__name__}: {e}")
+            return 1
+    texts = [s['text'] for s in scenes]
+    brolls = [s['brolls'] for s in scenes]
+    titles = [s['title'] for s in overridden]
+    ok = (
+        len(scenes) == 3
+        and texts[1] == ""
+        and all(b == "" for b in brolls)
+        and all(t == "Override" for t in titles)
+    )
+    if ok:
+        print("✅ CSV с пустыми и числовыми колонками читается")
+        return 0
+    print(f"❌ Неожиданные данные: texts={texts} brolls={brolls} titles={titles}")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(_run())
@@ -1,5 +1,8 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 
 class MultiLineFormatter(logging.Formatter):
@@ -17,6 +20,13 @@ class MultiLineFormatter(logging.Formatter):
 def setup_logger(name="automation", log_file="automation.log", level=logging.INFO):
     """
     Sets up a logger that writes to both file and console.
+
+    Records are handed to a QueueHandler. The message itself is still
+    interpolated on the calling thread (QueueHandler.prepare); a
+    QueueListener thread adds the timestamp/level prefix and does the
+    file/console writes, so logger calls from the asyncio loop don't block
+    on I/O. Plain print() output, including HeyGenAutomation._log, is not
+    routed through here and still writes to stdout directly.
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
@@ -26,19 +36,27 @@ def setup_logger(name="automation", log_file="automation.log", level=logging.INF
         return logger
     
     formatter = MultiLineFormatter()
+    handlers = []
     
     # File Handler
     try:
         file_handler = logging.FileHandler(log_file, mode="w", encoding="utf-8")
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
         print(f"Failed to create file handler: {e}")
     
     # Stream Handler (Console)
     stream_handler = logging.StreamHandler(sys.stdout)
     stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+    handlers.append(stream_handler)
+    
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Drain what is still queued on interpreter exit
+    atexit.register(listener.stop)
     
     return logger
 
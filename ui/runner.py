@@ -20,7 +20,7 @@ class AutomationRunner:
             self.config = json.load(f)
         self.csv_path = self.config.get("csv_file", "scenarios.csv")
         self.events = RunnerEvents()
-        self.max_concurrency = int(self.config.get("max_concurrency", 2))
+        self.max_concurrency = int(self.config.get("max_concurrency", 1))
         self.parallel_mode = str(self.config.get("parallel_mode", "tabs"))
         self.headless = bool(self.config.get("headless", False))
         self.automation = HeyGenAutomation(self.csv_path, self.config)
@@ -71,8 +71,12 @@ class AutomationRunner:
                 except Exception:
                     pass
                 ok = False
+                on_tab = self.max_concurrency > 1 and self.parallel_mode == "tabs"
                 try:
-                    ok = await self.automation.process_episode_part(ep, part)
+                    if on_tab:
+                        ok = await self.automation.process_on_tab(ep, part)
+                    else:
+                        ok = await self.automation.process_episode_part(ep, part)
                 except Exception as e:
                     if self._is_browser_closed_error(str(e)):
                         self.cancel = True
@@ -86,7 +90,10 @@ class AutomationRunner:
                         self.events.on_notice(f"error: episode={ep} part={part} err={str(e)}")
                 rep = None
                 try:
-                    rep = getattr(self.automation, "report", None)
+                    if on_tab:
+                        rep = self.automation.reports.get((str(ep), int(part)))
+                    else:
+                        rep = getattr(self.automation, "report", None)
                 except Exception:
                     rep = None
                 rep_summary = None
@@ -227,7 +234,7 @@ class AutomationRunner:
         try:
             b = df.get("brolls")
             if b is not None:
-                b2 = b.fillna("").astype(str).str.strip()
+                b2 = b.astype(object).fillna("").astype(str).str.strip()
                 b2 = b2.mask(b2.str.lower() == "nan", "")
                 broll_scenes = int((b2 != "").sum())
                 broll_count = broll_scenes
@@ -257,9 +264,15 @@ class AutomationRunner:
 
     def apply_episode_overrides(self, episode_id: str, title: Optional[str], template_url: Optional[str]) -> None:
         try:
-            if title:
-                self.automation.df.loc[self.automation.df['episode_id'] == episode_id, 'title'] = title
-            if template_url:
-                self.automation.df.loc[self.automation.df['episode_id'] == episode_id, 'template_url'] = template_url
+            df = self.automation.df
+            for col, value in (("title", title), ("template_url", template_url)):
+                if not value:
+                    continue
+                # Пустая колонка читается как float (NaN) — строку в неё pandas не запишет
+                if col in df.columns and df[col].dtype.kind in "biuf":
+                    df[col] = df[col].astype(object)
+                df.loc[df['episode_id'] == episode_id, col] = value
+            if title or template_url:
+                self.automation.reset_data_cache()
         except Exception:
             pass
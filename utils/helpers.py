@@ -5,11 +5,19 @@ These are pure functions with no side effects, safe to use anywhere.
 """
 
 import re
+from functools import lru_cache
 from typing import Any, Optional
 
 import pandas as pd
 
 
+# Workflow template placeholder: {{variable}}
+WF_VAR_PATTERN = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}")
+
+_WS_PATTERN = re.compile(r"\s+")
+_ANNOTATION_PATTERN = re.compile(r"\[[^\]]*\]")
+
+
 def coerce_scalar(v: Any) -> Any:
     """
     Coerce a pandas Series/DataFrame to a scalar value.
@@ -112,15 +120,18 @@ def normalize_text_for_compare(text: str, strip_annotations: bool = False) -> st
         Normalized text with collapsed whitespace
     """
     try:
-        t = str(text or '')
-        if strip_annotations:
-            t = re.sub(r"\[[^\]]*\]", "", t)
-        t = re.sub(r"\s+", " ", t).strip()
-        return t
+        return _normalize_text_cached(str(text or ''), bool(strip_annotations))
     except Exception:
         return str(text or '').strip()
 
 
+@lru_cache(maxsize=2048)
+def _normalize_text_cached(text: str, strip_annotations: bool) -> str:
+    if strip_annotations:
+        text = _ANNOTATION_PATTERN.sub("", text)
+    return _WS_PATTERN.sub(" ", text).strip()
+
+
 def safe_slug(value: str) -> str:
     """
     Create a filesystem-safe slug from a value.
@@ -233,6 +244,6 @@ def wf_render(v: Any, ctx: dict) -> str:
             if k in ctx:
                 return str(ctx.get(k) or "")
             return m.group(0)
-        return re.sub(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}", _repl, s)
+        return WF_VAR_PATTERN.sub(_repl, s)
     except Exception:
         return s